@@ -4,6 +4,18 @@ from flask import Flask
 
 from app.config import config
 from app.extensions import cors, db
+from app.utils.allergen_registry import init_allergen_registry
+from app.utils.db_pool import init_db_pool
+from app.utils.genai_client import init_genai_client
+from app.utils.image_workers import init_image_workers
+from app.utils.job_queue import init_job_queue
+from app.utils.jwt_utils import init_auth_cache
+from app.utils.llm_backend import init_llm_backend
+from app.utils.menu_search import init_menu_search
+from app.utils.metrics import init_metrics
+from app.utils.result_cache import init_result_cache
+from app.utils.single_flight import init_single_flight
+from app.utils.uploads import init_uploads
 
 
 def create_app(config_name=None):
@@ -15,11 +27,25 @@ def create_app(config_name=None):
 
     os.makedirs(config[config_name].INSTANCE_PATH, exist_ok=True)
 
+    init_db_pool(app)
     db.init_app(app)
+    init_metrics(app)
+    init_auth_cache(app)
+    init_genai_client(app)
+    init_llm_backend(app)
+    init_result_cache(app)
+    init_job_queue(app)
+    init_image_workers(app)
+    init_single_flight(app)
+    init_uploads(app)
 
     cors_origins = app.config['CORS_ORIGINS']
     if cors_origins == '*':
-        cors.init_app(app, supports_credentials=True)
+        cors.init_app(
+            app,
+            supports_credentials=True,
+            expose_headers=['X-Next-Cursor', 'X-Upload-Id', 'Idempotent-Replayed', 'ETag'],
+        )
     else:
         origins_list = [origin.strip() for origin in cors_origins.split(',')]
         cors.init_app(
@@ -27,8 +53,8 @@ def create_app(config_name=None):
             resources={r'/api/*': {
                 'origins': origins_list,
                 'methods': ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-                'allow_headers': ['Content-Type', 'Authorization'],
-                'expose_headers': ['Content-Type'],
+                'allow_headers': ['Content-Type', 'Authorization', 'Idempotency-Key', 'If-None-Match'],
+                'expose_headers': ['Content-Type', 'X-Next-Cursor', 'X-Upload-Id', 'Idempotent-Replayed', 'ETag'],
                 'supports_credentials': True
             }}
         )
@@ -40,4 +66,7 @@ def create_app(config_name=None):
     with app.app_context():
         db.create_all()
 
+    init_menu_search(app)
+    init_allergen_registry(app)
+
     return app
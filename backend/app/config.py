@@ -7,6 +7,32 @@ basedir = Path(__file__).parent.parent
 load_dotenv(basedir / '.env')
 
 
+def engine_options(
+    database_uri,
+    pool_size=5,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    statement_timeout_ms=0,
+):
+    """Build SQLALCHEMY_ENGINE_OPTIONS suited to database_uri"""
+    if database_uri.startswith('sqlite') and ':memory:' in database_uri:
+        # In-memory SQLite uses a single static connection; pool options do not apply
+        return {}
+
+    options = {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping,
+    }
+    if database_uri.startswith('postgresql') and statement_timeout_ms:
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout_ms}'}
+    return options
+
+
 class Config:
     """Base configuration class"""
 
@@ -29,6 +55,22 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool, per gunicorn worker process; size it so that
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) fits the server's connection limit
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS,
+    )
+
     INSTANCE_PATH = os.path.join(basedir, 'instance')
 
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS')
@@ -43,6 +85,79 @@ class Config:
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_REDIRECT_URI = os.environ.get('GOOGLE_REDIRECT_URI', 'http://localhost:5173')
 
+    # Verified access token and user existence caches; TTLs are in seconds
+    AUTH_CACHE_MAX_ENTRIES = int(os.environ.get('AUTH_CACHE_MAX_ENTRIES', 4096))
+    AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 300))
+    AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+
+    # Shared Gemini client; timeouts are in seconds
+    GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+    # Optional override of the Gemini API endpoint, e.g. a proxy or a load-test stub
+    GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL')
+    GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT', 60))
+    GEMINI_RETRY_ATTEMPTS = int(os.environ.get('GEMINI_RETRY_ATTEMPTS', 3))
+    GEMINI_RETRY_INITIAL_DELAY = float(os.environ.get('GEMINI_RETRY_INITIAL_DELAY', 1))
+    GEMINI_RETRY_MAX_DELAY = float(os.environ.get('GEMINI_RETRY_MAX_DELAY', 10))
+    GEMINI_MAX_CONNECTIONS = int(os.environ.get('GEMINI_MAX_CONNECTIONS', 20))
+    GEMINI_KEEPALIVE_EXPIRY = float(os.environ.get('GEMINI_KEEPALIVE_EXPIRY', 60))
+
+    # Model provider for menu analysis: 'gemini', or 'fake' for offline load tests.
+    # The fake draws latency from LLM_FAKE_LATENCY (constant:S, uniform:LOW,HIGH,
+    # normal:MEAN,STDDEV, lognormal:MEDIAN,SIGMA or exponential:MEAN), plus
+    # LLM_FAKE_LATENCY_PER_ITEM for each returned item, and fails with a 503
+    # at LLM_FAKE_ERROR_RATE
+    LLM_BACKEND = os.environ.get('LLM_BACKEND', 'gemini')
+    LLM_FAKE_LATENCY = os.environ.get('LLM_FAKE_LATENCY', 'constant:0')
+    LLM_FAKE_LATENCY_PER_ITEM = float(os.environ.get('LLM_FAKE_LATENCY_PER_ITEM', 0))
+    LLM_FAKE_ERROR_RATE = float(os.environ.get('LLM_FAKE_ERROR_RATE', 0))
+    LLM_FAKE_STREAM_CHUNKS = int(os.environ.get('LLM_FAKE_STREAM_CHUNKS', 8))
+    LLM_FAKE_SEED = os.environ.get('LLM_FAKE_SEED', '0')
+
+    # Upper bound on concurrent Gemini calls fanned out by a single request
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 4))
+    MENU_BATCH_MAX_ITEMS = int(os.environ.get('MENU_BATCH_MAX_ITEMS', 50))
+
+    # Estimated token budget per Gemini call when classifying long manual menus
+    MENU_CHUNK_MAX_TOKENS = int(os.environ.get('MENU_CHUNK_MAX_TOKENS', 4000))
+
+    # Menu image preprocessing: 'quality', 'balanced' or 'fast'
+    IMAGE_PREPROCESS_PROFILE = os.environ.get('IMAGE_PREPROCESS_PROFILE', 'balanced')
+
+    # Encoding of the preprocessed image sent to Gemini. 'adaptive' uses the highest
+    # quality that fits IMAGE_ENCODE_MAX_BYTES, never below IMAGE_ENCODE_MIN_QUALITY;
+    # 'fixed' is the previous JPEG quality 75 with optimize
+    IMAGE_ENCODER = os.environ.get('IMAGE_ENCODER', 'adaptive')
+    IMAGE_ENCODE_FORMAT = os.environ.get('IMAGE_ENCODE_FORMAT', 'jpeg')
+    IMAGE_ENCODE_MAX_BYTES = int(os.environ.get('IMAGE_ENCODE_MAX_BYTES', 350_000))
+    IMAGE_ENCODE_MIN_QUALITY = int(os.environ.get('IMAGE_ENCODE_MIN_QUALITY', 45))
+    IMAGE_ENCODE_MAX_QUALITY = int(os.environ.get('IMAGE_ENCODE_MAX_QUALITY', 75))
+    IMAGE_ENCODE_GRAYSCALE = os.environ.get('IMAGE_ENCODE_GRAYSCALE', 'false').lower() in ('1', 'true', 'yes')
+
+    # Uploads: request bodies over MAX_CONTENT_LENGTH bytes get a 413. Files in bodies over
+    # UPLOAD_SPOOL_MAX_MEMORY are spooled to UPLOAD_SPOOL_DIR (default: the system temp
+    # directory) and memory-mapped by the image workers. Images over IMAGE_MAX_PIXELS are
+    # rejected from their header, before anything is decoded
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 50 * 1024 * 1024))
+    UPLOAD_SPOOL_MAX_MEMORY = int(os.environ.get('UPLOAD_SPOOL_MAX_MEMORY', 1024 * 1024))
+    UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or None
+    IMAGE_MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', 64_000_000))
+
+    # Process pool for image decoding/encoding; 0 processes images in the request thread
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', os.cpu_count() or 1))
+    IMAGE_WORKER_MAX_PENDING = int(os.environ.get('IMAGE_WORKER_MAX_PENDING', 16))
+    IMAGE_WORKER_TIMEOUT = float(os.environ.get('IMAGE_WORKER_TIMEOUT', 30))
+
+    # Menu analysis result cache: 'memory', 'sql' or 'none'
+    RESULT_CACHE_BACKEND = os.environ.get('RESULT_CACHE_BACKEND', 'memory')
+    RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 7 * 24 * 60 * 60))
+    RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 1024))
+
+    # Background menu analysis jobs (POST /process-menu?async=true)
+    MENU_JOB_WORKERS = int(os.environ.get('MENU_JOB_WORKERS', 4))
+    # Jobs allowed to wait for a worker; further async uploads get a 503
+    MENU_JOB_MAX_PENDING = int(os.environ.get('MENU_JOB_MAX_PENDING', 32))
+    MENU_JOB_TIMEOUT = int(os.environ.get('MENU_JOB_TIMEOUT', 300))
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -61,7 +176,12 @@ class TestingConfig(Config):
 
     TESTING = True
     DEBUG = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # Benchmarks that share the app between threads point this at a file
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    IMAGE_WORKERS = 0
+    # Not LLM_BACKEND, which .env sets for development; tests only call Gemini when asked to
+    LLM_BACKEND = os.environ.get('TEST_LLM_BACKEND', 'fake')
 
 
 # Configuration dictionary
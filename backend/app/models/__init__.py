@@ -1,6 +1,41 @@
-from app.models.allergen import STANDARD_ALLERGENS, Allergen
-from app.models.menu_upload import MenuUpload
+from app.models.allergen import (
+    ALLERGEN_BITS,
+    STANDARD_ALLERGENS,
+    Allergen,
+    allergen_mask,
+    allergen_names,
+)
+from app.models.analysis_cache_entry import AnalysisCacheEntry
+from app.models.item_analysis import ItemAnalysis
+from app.models.menu_item import MenuItem
+from app.models.menu_upload import (
+    UPLOAD_IN_PROGRESS_STATUSES,
+    UPLOAD_STATUS_ANALYZING,
+    UPLOAD_STATUS_COMPLETED,
+    UPLOAD_STATUS_FAILED,
+    UPLOAD_STATUS_PENDING,
+    UPLOAD_STATUS_PREPROCESSING,
+    MenuUpload,
+)
 from app.models.user import User
 from app.models.user_allergy import UserAllergy
 
-__all__ = ['User', 'Allergen', 'UserAllergy', 'MenuUpload', 'STANDARD_ALLERGENS']
+__all__ = [
+    'User',
+    'Allergen',
+    'UserAllergy',
+    'MenuUpload',
+    'MenuItem',
+    'AnalysisCacheEntry',
+    'ItemAnalysis',
+    'STANDARD_ALLERGENS',
+    'ALLERGEN_BITS',
+    'allergen_mask',
+    'allergen_names',
+    'UPLOAD_STATUS_PENDING',
+    'UPLOAD_STATUS_PREPROCESSING',
+    'UPLOAD_STATUS_ANALYZING',
+    'UPLOAD_STATUS_COMPLETED',
+    'UPLOAD_STATUS_FAILED',
+    'UPLOAD_IN_PROGRESS_STATUSES',
+]
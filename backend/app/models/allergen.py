@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from sqlalchemy import Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -20,6 +20,38 @@ STANDARD_ALLERGENS = {
     'Sesame',
 }
 
+# Stable bit positions for allergen bitmasks; never reorder, masks are persisted
+ALLERGEN_BITS = {
+    name: 1 << position
+    for position, name in enumerate(
+        (
+            'Milk',
+            'Eggs',
+            'Fish',
+            'Shellfish',
+            'Tree Nuts',
+            'Peanuts',
+            'Wheat',
+            'Soybeans',
+            'Sesame',
+        )
+    )
+}
+_ALLERGEN_BITS_BY_KEY = {name.casefold(): bit for name, bit in ALLERGEN_BITS.items()}
+
+
+def allergen_mask(names: Iterable[str]) -> int:
+    """Fold allergen names into a bitmask; names outside the standard set are ignored"""
+    mask = 0
+    for name in names:
+        mask |= _ALLERGEN_BITS_BY_KEY.get(str(name).strip().casefold(), 0)
+    return mask
+
+
+def allergen_names(mask: int) -> list[str]:
+    """Expand a bitmask back into allergen names in bit order"""
+    return [name for name, bit in ALLERGEN_BITS.items() if mask & bit]
+
 
 class Allergen(db.Model):
     __tablename__ = 'allergens'
@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import JSON
+
+from app.extensions import db
+
+
+class AnalysisCacheEntry(db.Model):
+    __tablename__ = 'analysis_cache'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cache_key: Mapped[str] = mapped_column(
+        String(255), unique=True, nullable=False, index=True
+    )
+    analysis_result: Mapped[list[dict[str, Any]]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+    last_accessed_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
+
+    def __init__(self, cache_key: str, analysis_result: list[dict[str, Any]]):
+        self.cache_key = cache_key
+        self.analysis_result = analysis_result
+
+    def __repr__(self) -> str:
+        return f'<AnalysisCacheEntry {self.cache_key}>'
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import JSON
+
+from app.extensions import db
+
+
+class ItemAnalysis(db.Model):
+    __tablename__ = 'item_analyses'
+    __table_args__ = (UniqueConstraint('normalized_name', 'prompt_version'),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    normalized_name: Mapped[str] = mapped_column(
+        String(255), nullable=False, index=True
+    )
+    item_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    common_allergens: Mapped[list[str]] = mapped_column(JSON, nullable=False)
+    confidence_score: Mapped[int] = mapped_column(Integer, nullable=False)
+    prompt_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
+    )
+
+    def __init__(
+        self,
+        normalized_name: str,
+        item_name: str,
+        common_allergens: list[str],
+        confidence_score: int,
+        prompt_version: int,
+    ):
+        self.normalized_name = normalized_name
+        self.item_name = item_name
+        self.common_allergens = common_allergens
+        self.confidence_score = confidence_score
+        self.prompt_version = prompt_version
+
+    def to_dict(self) -> dict:
+        return {
+            'item_name': self.item_name,
+            'common_allergens': self.common_allergens,
+            'confidence_score': self.confidence_score,
+        }
+
+    def __repr__(self) -> str:
+        return f'<ItemAnalysis {self.normalized_name} v{self.prompt_version}>'
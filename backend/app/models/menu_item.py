@@ -0,0 +1,75 @@
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.extensions import db
+from app.models.allergen import allergen_mask, allergen_names
+
+if TYPE_CHECKING:
+    from app.models import MenuUpload
+
+MAX_ITEM_NAME_LENGTH = 255
+
+
+class MenuItem(db.Model):
+    __tablename__ = 'menu_items'
+    __table_args__ = (
+        Index('ix_menu_items_user_id_allergen_mask', 'user_id', 'allergen_mask'),
+        Index('ix_menu_items_user_id_confidence_score', 'user_id', 'confidence_score'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    upload_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey('menu_uploads.id', ondelete='CASCADE'), index=True, nullable=False
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey('users.id'), nullable=False
+    )
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    item_name: Mapped[str] = mapped_column(String(MAX_ITEM_NAME_LENGTH), nullable=False)
+    allergen_mask: Mapped[int] = mapped_column(Integer, nullable=False)
+    confidence_score: Mapped[int] = mapped_column(Integer, nullable=False)
+    upload: Mapped['MenuUpload'] = relationship('MenuUpload', back_populates='items')
+
+    def __init__(
+        self,
+        user_id: int,
+        position: int,
+        item_name: str,
+        allergen_mask: int,
+        confidence_score: int,
+    ):
+        self.user_id = user_id
+        self.position = position
+        self.item_name = item_name
+        self.allergen_mask = allergen_mask
+        self.confidence_score = confidence_score
+
+    @classmethod
+    def from_analysis(cls, user_id: int, position: int, item: dict[str, Any]) -> 'MenuItem':
+        """Build a row from one analysis_result entry"""
+        try:
+            confidence_score = int(item.get('confidence_score') or 0)
+        except (TypeError, ValueError):
+            confidence_score = 0
+        return cls(
+            user_id=user_id,
+            position=position,
+            item_name=str(item.get('item_name', ''))[:MAX_ITEM_NAME_LENGTH],
+            allergen_mask=allergen_mask(item.get('common_allergens') or []),
+            confidence_score=confidence_score,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'upload_id': self.upload_id,
+            'position': self.position,
+            'item_name': self.item_name,
+            'allergens': allergen_names(self.allergen_mask),
+            'confidence_score': self.confidence_score,
+        }
+
+    def __repr__(self) -> str:
+        return f'<MenuItem upload_id={self.upload_id} item_name={self.item_name}>'
@@ -1,18 +1,37 @@
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Optional
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.types import JSON
 
 from app.extensions import db
+from app.models.menu_item import MenuItem
 
 if TYPE_CHECKING:
     from app.models import User
 
+# Analysis job lifecycle; uploads processed synchronously are created completed
+UPLOAD_STATUS_PENDING = 'pending'
+UPLOAD_STATUS_PREPROCESSING = 'preprocessing'
+UPLOAD_STATUS_ANALYZING = 'analyzing'
+UPLOAD_STATUS_COMPLETED = 'completed'
+UPLOAD_STATUS_FAILED = 'failed'
+UPLOAD_IN_PROGRESS_STATUSES = (
+    UPLOAD_STATUS_PENDING,
+    UPLOAD_STATUS_PREPROCESSING,
+    UPLOAD_STATUS_ANALYZING,
+)
+
 
 class MenuUpload(db.Model):
     __tablename__ = 'menu_uploads'
+    __table_args__ = (
+        Index('ix_menu_uploads_user_id_created_at', 'user_id', 'created_at'),
+        UniqueConstraint(
+            'user_id', 'idempotency_key', name='uq_menu_uploads_user_id_idempotency_key'
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(
@@ -23,14 +42,48 @@ class MenuUpload(db.Model):
         DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
     )
     analysis_result: Mapped[list[dict[str, Any]]] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(20),
+        default=UPLOAD_STATUS_COMPLETED,
+        server_default=UPLOAD_STATUS_COMPLETED,
+        nullable=False,
+    )
+    error: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    # How the image was encoded for Gemini, e.g. 'jpeg:q68'; None for manual input
+    image_encoding: Mapped[Optional[str]] = mapped_column(String(40), nullable=True)
+    # Client-supplied Idempotency-Key of the request that created this upload
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     user: Mapped['User'] = relationship('User', back_populates='uploads')
+    items: Mapped[list['MenuItem']] = relationship(
+        'MenuItem',
+        back_populates='upload',
+        cascade='all, delete-orphan',
+        order_by='MenuItem.position',
+    )
 
     def __init__(
-        self, user_id: int, upload_name: str, analysis_result: list[dict[str, Any]]
+        self,
+        user_id: int,
+        upload_name: str,
+        analysis_result: list[dict[str, Any]],
+        status: str = UPLOAD_STATUS_COMPLETED,
+        image_encoding: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
     ):
         self.user_id = user_id
         self.upload_name = upload_name
+        self.status = status
+        self.image_encoding = image_encoding
+        self.idempotency_key = idempotency_key
+        self.set_analysis_result(analysis_result)
+
+    def set_analysis_result(self, analysis_result: list[dict[str, Any]]) -> None:
+        """Store an analysis result along with its normalized MenuItem rows"""
         self.analysis_result = analysis_result
+        self.items = [
+            MenuItem.from_analysis(self.user_id, position, item)
+            for position, item in enumerate(analysis_result)
+        ]
 
     def to_dict(self) -> dict:
         return {
@@ -39,6 +92,18 @@ class MenuUpload(db.Model):
             'upload_name': self.upload_name,
             'created_at': self.created_at.isoformat(),
             'analysis_result': self.analysis_result,
+            'status': self.status,
+            'image_encoding': self.image_encoding,
+        }
+
+    def to_summary_dict(self) -> dict:
+        """Serialize without analysis_result, for history listings"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'upload_name': self.upload_name,
+            'created_at': self.created_at.isoformat(),
+            'status': self.status,
         }
 
     def __repr__(self) -> str:
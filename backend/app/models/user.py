@@ -25,6 +25,10 @@ class User(db.Model):
     name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     email_verified: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     profile_picture: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    # Bumped by every write to the user's profile, allergies or menu history; drives ETags
+    data_version: Mapped[int] = mapped_column(
+        Integer, default=0, server_default='0', nullable=False
+    )
     allergens: Mapped[list['UserAllergy']] = relationship(
         'UserAllergy', back_populates='user', cascade='all, delete-orphan'
     )
@@ -24,7 +24,11 @@ class UserAllergy(db.Model):
         Integer, ForeignKey('allergens.id'), index=True, nullable=False
     )
     user: Mapped['User'] = relationship('User', back_populates='allergens')
-    allergen: Mapped['Allergen'] = relationship('Allergen', back_populates='users')
+    # Names come from the allergen registry, so a lazy load here would be an N+1;
+    # use joinedload() or selectinload() where the Allergen row itself is needed
+    allergen: Mapped['Allergen'] = relationship(
+        'Allergen', back_populates='users', lazy='raise_on_sql'
+    )
 
     def __init__(self, user_id: int, allergen_id: int, severity: int):
         self.user_id = user_id
@@ -32,12 +36,20 @@ class UserAllergy(db.Model):
         self.severity = severity
 
     def to_dict(self) -> dict:
+        return self.row_to_dict(self)
+
+    @staticmethod
+    def row_to_dict(row) -> dict:
+        """Serialize a UserAllergy, or a Row of its id, user_id, allergen_id and severity columns"""
+        # Imported here because the registry module imports the models
+        from app.utils.allergen_registry import get_allergen_registry
+
         return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'allergen_id': self.allergen_id,
-            'severity': self.severity,
-            'allergen_name': self.allergen.name,
+            'id': row.id,
+            'user_id': row.user_id,
+            'allergen_id': row.allergen_id,
+            'severity': row.severity,
+            'allergen_name': get_allergen_registry().name_for(row.allergen_id),
         }
 
     def __repr__(self) -> str:
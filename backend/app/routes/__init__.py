@@ -2,6 +2,7 @@ from app.routes.allergy_routes import allergy_bp
 from app.routes.auth_routes import auth_bp
 from app.routes.health_routes import health_bp
 from app.routes.llm_routes import llm_bp
+from app.routes.menu_item_routes import menu_item_bp
 
 
 def register_blueprints(app):
@@ -9,3 +10,4 @@ def register_blueprints(app):
     app.register_blueprint(llm_bp, url_prefix='/api')
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(allergy_bp, url_prefix='/api')
+    app.register_blueprint(menu_item_bp, url_prefix='/api')
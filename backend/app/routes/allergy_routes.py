@@ -1,27 +1,81 @@
 from flask import Blueprint, jsonify, request
-from sqlalchemy import select
+from sqlalchemy import bindparam, delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.extensions import db
-from app.models import STANDARD_ALLERGENS, Allergen, UserAllergy
+from app.models import STANDARD_ALLERGENS, UserAllergy
+from app.utils.allergen_registry import get_allergen_registry
+from app.utils.data_version import bump_data_version, conditional_user_get
 from app.utils.jwt_utils import token_required
 
 allergy_bp = Blueprint('allergy', __name__)
 
+# Dialects whose INSERT supports ON CONFLICT (user_id, allergen_id) DO UPDATE
+UPSERT_INSERTS = {
+    'postgresql': postgresql_insert,
+    'sqlite': sqlite_insert,
+}
+
+
+# Built once so each request reuses SQLAlchemy's cached compilation of it
+USER_ALLERGY_ROWS = (
+    select(UserAllergy.id, UserAllergy.user_id, UserAllergy.allergen_id, UserAllergy.severity)
+    .where(UserAllergy.user_id == bindparam('user_id'))
+    .order_by(UserAllergy.severity.desc())
+)
+
+
+def list_user_allergies(user_id):
+    """Serialize the user's allergies straight from result rows, without building ORM objects"""
+    rows = db.session.execute(USER_ALLERGY_ROWS, {'user_id': user_id})
+    return [UserAllergy.row_to_dict(row) for row in rows]
+
+
+def replace_user_allergies(user_id, severities):
+    """Make {allergen_id: severity} the user's complete allergy set; the caller commits"""
+    table = UserAllergy.__table__
+    rows = [
+        {'user_id': user_id, 'allergen_id': allergen_id, 'severity': severity}
+        for allergen_id, severity in severities.items()
+    ]
+
+    dialect_insert = UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if dialect_insert is None:
+        # No portable upsert: clear the user's rows and insert the new set
+        db.session.execute(delete(UserAllergy).where(UserAllergy.user_id == user_id))
+        if rows:
+            db.session.execute(insert(UserAllergy), rows)
+        return
+
+    db.session.execute(
+        delete(UserAllergy).where(
+            UserAllergy.user_id == user_id,
+            UserAllergy.allergen_id.not_in(list(severities)),
+        )
+    )
+    if not rows:
+        return
+
+    stmt = dialect_insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.allergen_id],
+        set_={'severity': stmt.excluded.severity},
+        # Leave unchanged rows alone instead of rewriting them
+        where=table.c.severity != stmt.excluded.severity,
+    )
+    db.session.execute(stmt)
+
 
 @allergy_bp.route('/allergy/get', methods=['GET'])
 @token_required
+@conditional_user_get
 def get_allergy(current_user):
     """Retrieve all allergies for the current user"""
-    stmt = (
-        select(UserAllergy)
-        .where(UserAllergy.user_id == current_user.id)
-        .order_by(UserAllergy.severity.desc())
-    )
-    user_allergies = db.session.scalars(stmt).all()
     return jsonify(
         {
             'message': 'Allergies retrieved successfully',
-            'user_allergy': [user_allergy.to_dict() for user_allergy in user_allergies],
+            'user_allergy': list_user_allergies(current_user.id),
         }
     ), 200
 
@@ -53,24 +107,24 @@ def add_allergy(current_user):
     if not 1 <= food_severity <= 3:
         return jsonify({'error': 'Invalid allergy severity'}), 400
 
-    stmt = select(Allergen).where(Allergen.name == allergen_name)
-    allergen = db.session.execute(stmt).scalar_one_or_none()
-    if not allergen:
+    allergen_id = get_allergen_registry().id_for(allergen_name)
+    if allergen_id is None:
         return jsonify({'error': 'Allergen not found'}), 404
 
     stmt = (
         select(UserAllergy)
         .where(UserAllergy.user_id == current_user.id)
-        .where(UserAllergy.allergen_id == allergen.id)
+        .where(UserAllergy.allergen_id == allergen_id)
     )
     user_allergy = db.session.execute(stmt).scalar_one_or_none()
     if user_allergy:
         return jsonify({'error': 'User allergy already exists'}), 400
 
     new_user_allergy = UserAllergy(
-        user_id=current_user.id, allergen_id=allergen.id, severity=food_severity
+        user_id=current_user.id, allergen_id=allergen_id, severity=food_severity
     )
     db.session.add(new_user_allergy)
+    bump_data_version(current_user.id)
     db.session.commit()
     return jsonify(
         {
@@ -119,6 +173,7 @@ def update_allergy(current_user):
         ), 401
 
     user_allergy.severity = severity
+    bump_data_version(current_user.id)
     db.session.commit()
     return jsonify(
         {
@@ -155,5 +210,57 @@ def delete_allergy(current_user):
         ), 401
 
     db.session.delete(user_allergy)
+    bump_data_version(current_user.id)
     db.session.commit()
     return jsonify({'message': 'Ok'}), 200
+
+
+@allergy_bp.route('/allergy/bulk', methods=['PUT'])
+@token_required
+def replace_allergies(current_user):
+    """Replace the current user's allergies with the given {allergen_name: severity} set"""
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No json body provided'}), 400
+    if not isinstance(data, dict):
+        return jsonify({'error': 'The json body must be an object'}), 400
+
+    allergies = data.get('allergies')
+    if not isinstance(allergies, dict):
+        return jsonify({'error': 'allergies must be an object of allergen_name: severity'}), 400
+
+    severities_by_name = {}
+    for allergen_name, severity in allergies.items():
+        allergen_name = allergen_name.strip().title()
+        if allergen_name not in STANDARD_ALLERGENS:
+            return jsonify({'error': f'Invalid allergen_name: {allergen_name}'}), 400
+        if allergen_name in severities_by_name:
+            return jsonify({'error': f'Duplicate allergen_name: {allergen_name}'}), 400
+        if isinstance(severity, bool) or not isinstance(severity, int) or not 1 <= severity <= 3:
+            return jsonify(
+                {'error': f'Severity for {allergen_name} must be between 1 and 3; 1 for mild and 3 for severe'}
+            ), 400
+        severities_by_name[allergen_name] = severity
+
+    registry = get_allergen_registry()
+    severities = {}
+    for allergen_name, severity in severities_by_name.items():
+        allergen_id = registry.id_for(allergen_name)
+        if allergen_id is None:
+            return jsonify({'error': f'Allergen not found: {allergen_name}'}), 404
+        severities[allergen_id] = severity
+
+    try:
+        replace_user_allergies(current_user.id, severities)
+        bump_data_version(current_user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to update allergies: {str(e)}'}), 500
+
+    return jsonify(
+        {
+            'message': 'Allergies updated successfully',
+            'user_allergy': list_user_allergies(current_user.id),
+        }
+    ), 200
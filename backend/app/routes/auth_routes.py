@@ -3,11 +3,13 @@ from sqlalchemy import select
 
 from app.extensions import db
 from app.models import User
+from app.utils.data_version import bump_data_version, conditional_user_get
 from app.utils.google_oauth import verify_google_token
 from app.utils.jwt_utils import (
     decode_token,
     generate_access_token,
     generate_refresh_token,
+    invalidate_user_cache,
     token_required,
 )
 from app.utils.validators import validate_email_address, validate_password_strength
@@ -116,7 +118,9 @@ def google_auth():
     if user:
         user.name = google_user_info.get('name') or user.name
         user.profile_picture = google_user_info.get('picture') or user.profile_picture
+        bump_data_version(user.id)
         db.session.commit()
+        invalidate_user_cache(user.id)
 
         access_token = generate_access_token(user.id)
         refresh_token = generate_refresh_token(user.id)
@@ -141,7 +145,9 @@ def google_auth():
         user.profile_picture = google_user_info.get('picture') or user.profile_picture
         if not user.name:
             user.name = google_user_info.get('name')
+        bump_data_version(user.id)
         db.session.commit()
+        invalidate_user_cache(user.id)
 
         access_token = generate_access_token(user.id)
         refresh_token = generate_refresh_token(user.id)
@@ -204,6 +210,7 @@ def refresh():
 
 @auth_bp.route('/auth/me', methods=['GET'])
 @token_required
+@conditional_user_get
 def get_current_user(current_user):
     """Get current user info from token"""
     return jsonify({'user': current_user.to_dict()}), 200
@@ -226,7 +233,9 @@ def update_profile(current_user):
             data['profile_picture'].strip() if data['profile_picture'] else None
         )
 
+    bump_data_version(current_user.id)
     db.session.commit()
+    invalidate_user_cache(current_user.id)
 
     return jsonify(
         {'message': 'Profile updated successfully', 'user': current_user.to_dict()}
@@ -253,6 +262,8 @@ def change_password(current_user):
         return jsonify({'error': password_error}), 400
 
     current_user.set_password(data['new_password'])
+    bump_data_version(current_user.id)
     db.session.commit()
+    invalidate_user_cache(current_user.id)
 
     return jsonify({'message': 'Password changed successfully'}), 200
@@ -1,4 +1,11 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify
+
+from app.utils.db_pool import pool_stats
+from app.utils.genai_client import get_genai_registry
+from app.utils.image_workers import get_image_workers
+from app.utils.metrics import get_metrics
+from app.utils.result_cache import get_result_cache
+from app.utils.single_flight import get_single_flight
 
 health_bp = Blueprint('health', __name__)
 
@@ -7,3 +14,39 @@ health_bp = Blueprint('health', __name__)
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy'}), 200
+
+
+@health_bp.route('/health/cache', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters for the menu analysis result cache"""
+    return jsonify(get_result_cache().stats()), 200
+
+
+@health_bp.route('/health/genai', methods=['GET'])
+def genai_stats():
+    """Shared Gemini client and HTTP connection reuse counters"""
+    return jsonify(get_genai_registry().stats()), 200
+
+
+@health_bp.route('/health/image-workers', methods=['GET'])
+def image_worker_stats():
+    """Image worker pool size and backpressure counters"""
+    return jsonify(get_image_workers().stats()), 200
+
+
+@health_bp.route('/health/coalescing', methods=['GET'])
+def coalescing_stats():
+    """Menu analyses run versus identical in-flight requests that waited on them"""
+    return jsonify(get_single_flight().stats()), 200
+
+
+@health_bp.route('/health/db', methods=['GET'])
+def db_pool_stats():
+    """Database connection pool occupancy and checkout wait times"""
+    return jsonify(pool_stats()), 200
+
+
+@health_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Request latency and menu pipeline histograms in the Prometheus text format"""
+    return Response(get_metrics().render(), mimetype='text/plain; version=0.0.4')
@@ -1,259 +1,660 @@
-import io
+import hashlib
 import json
-
-import pillow_heif
-from flask import Blueprint, jsonify, request
-from google import genai
-from google.genai import types
-from PIL import Image, ImageEnhance, ImageOps
-from sqlalchemy import select
+from datetime import datetime, timedelta, timezone
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+    url_for,
+)
+from sqlalchemy import exists, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer
 
 from app.extensions import db
-from app.models import STANDARD_ALLERGENS, MenuUpload
+from app.models import (
+    UPLOAD_IN_PROGRESS_STATUSES,
+    UPLOAD_STATUS_ANALYZING,
+    UPLOAD_STATUS_COMPLETED,
+    UPLOAD_STATUS_FAILED,
+    UPLOAD_STATUS_PENDING,
+    UPLOAD_STATUS_PREPROCESSING,
+    MenuItem,
+    MenuUpload,
+)
+from app.utils.allergen_matcher import (
+    allergen_mask_clause,
+    annotate_for_user,
+    load_user_matcher,
+    parse_allergen_list,
+)
+from app.utils.concurrency import map_in_app_context
+from app.utils.data_version import bump_data_version, conditional_user_get
+from app.utils.job_queue import JobQueueFull, get_job_queue
 from app.utils.jwt_utils import token_required
-
-pillow_heif.register_heif_opener()
+from app.utils.menu_analysis import (
+    MenuAnalysisError,
+    analyze_menu_image,
+    analyze_menu_items,
+    prepare_menu_image,
+    stream_menu_image,
+    stream_menu_items,
+)
+from app.utils.menu_search import search_menu_items
+from app.utils.metrics import record_size, stage_timer
+from app.utils.pagination import InvalidCursor, encode_cursor, parse_cursor_arg
+from app.utils.single_flight import get_single_flight
+from app.utils.uploads import discard_upload, keep_upload, upload_sha256, upload_source
 
 llm_bp = Blueprint('llm', __name__)
 
+ALLOWED_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.heic', '.heif', '.webp')
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+JOB_PROGRESS = {
+    UPLOAD_STATUS_PENDING: 0.0,
+    UPLOAD_STATUS_PREPROCESSING: 0.25,
+    UPLOAD_STATUS_ANALYZING: 0.5,
+    UPLOAD_STATUS_COMPLETED: 1.0,
+    UPLOAD_STATUS_FAILED: 1.0,
+}
+
+
+def idempotency_key_header():
+    """Return (Idempotency-Key header or None, None) or (None, error response)"""
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key is None:
+        return None, None
+    idempotency_key = idempotency_key.strip()
+    if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return None, (
+            jsonify({'error': f'Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters'}),
+            400,
+        )
+    return idempotency_key, None
+
+
+def find_idempotent_upload(user_id, idempotency_key):
+    stmt = select(MenuUpload).filter_by(user_id=user_id, idempotency_key=idempotency_key)
+    return db.session.execute(stmt).scalar_one_or_none()
+
+
+def replayed_upload(current_user, upload):
+    """(body, status code, upload id) answering a retry of the request that created upload"""
+    if upload.status == UPLOAD_STATUS_COMPLETED:
+        return annotate_for_user(current_user.id, upload.analysis_result), 200, upload.id
+    status_url = url_for('llm.get_menu_upload_status', upload_id=upload.id)
+    return (
+        {'error': 'A request with this Idempotency-Key is still being processed', 'status_url': status_url},
+        409,
+        upload.id,
+    )
+
+
+def annotated_upload(upload, matcher):
+    """Serialize a completed upload with its items risk-annotated by the user's matcher"""
+    upload_data = upload.to_dict()
+    upload_data['analysis_result'] = matcher.annotate(upload.analysis_result)
+    return upload_data
 
-def preprocess_image(image_file, max_size=1536, enhance=True):
-    """Preprocess and optimize image for Gemini processing"""
-    img = Image.open(image_file)
 
-    if img.mode != 'RGB':
-        img = img.convert('RGB')
+def menu_upload_response(body, status_code, upload_id, replayed=False):
+    response = jsonify(body)
+    if upload_id is not None:
+        response.headers['X-Upload-Id'] = str(upload_id)
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response, status_code
 
+
+def save_menu_upload(current_user, upload_name, parsed_data, image_encoding=None, idempotency_key=None):
+    """Persist an analysis result to the user's history, returning (body, status code, upload id)"""
     try:
-        img = ImageOps.exif_transpose(img)
-    except Exception:
-        pass
+        menu_upload = MenuUpload(
+            user_id=current_user.id,
+            upload_name=upload_name.strip(),
+            analysis_result=parsed_data,
+            image_encoding=image_encoding,
+            idempotency_key=idempotency_key,
+        )
+        db.session.add(menu_upload)
+        bump_data_version(current_user.id)
+        with stage_timer('db-commit'):
+            db.session.commit()
+        record_size('item_count', len(parsed_data), 'items')
+        return annotate_for_user(current_user.id, parsed_data), 200, menu_upload.id
+    except IntegrityError as e:
+        db.session.rollback()
+        # Another worker process saved the same idempotent request first
+        existing = find_idempotent_upload(current_user.id, idempotency_key) if idempotency_key else None
+        if existing is None:
+            return {'error': f'Failed to save menu upload: {str(e)}'}, 500, None
+        return replayed_upload(current_user, existing)
+    except Exception as e:
+        db.session.rollback()
+        return {'error': f'Failed to save menu upload: {str(e)}'}, 500, None
 
-    if max(img.size) > max_size:
-        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
 
-    if enhance:
-        enhancer = ImageEnhance.Contrast(img)
-        img = enhancer.enhance(1.2)
+def process_once(current_user, upload_name, analyze, fingerprint, idempotency_key):
+    """Analyze and save a menu, sharing the outcome with identical requests already in flight"""
+    if idempotency_key:
+        existing = find_idempotent_upload(current_user.id, idempotency_key)
+        if existing is not None:
+            return menu_upload_response(*replayed_upload(current_user, existing), replayed=True)
+        flight_key = f'{current_user.id}:key:{idempotency_key}'
+    else:
+        flight_key = f'{current_user.id}:sha256:{fingerprint}'
 
-        enhancer = ImageEnhance.Sharpness(img)
-        img = enhancer.enhance(1.3)
+    def analyze_and_save():
+        try:
+            parsed_data, image_encoding = analyze()
+        except MenuAnalysisError as e:
+            return {'error': e.message}, e.status_code, None
+        return save_menu_upload(
+            current_user, upload_name, parsed_data, image_encoding, idempotency_key
+        )
 
-    return img
+    (body, status_code, upload_id), shared = get_single_flight().do(flight_key, analyze_and_save)
+    return menu_upload_response(body, status_code, upload_id, replayed=shared)
 
 
-def image_to_bytes(img, format='JPEG', quality=75):
-    """Convert PIL Image to bytes for API transmission"""
-    buffer = io.BytesIO()
+def run_menu_job(upload_id, source):
+    """Background job: analyze an uploaded menu image and store the result"""
     try:
-        img.save(buffer, format=format, quality=quality, optimize=True)
-        buffer.seek(0)
-        return buffer.getvalue()
+        analyze_menu_job(upload_id, source)
     finally:
-        buffer.close()
-
-
-# Gemini prompts
-gemini_image_prompt = (
-    'Extract all food items from this menu image. For each item, identify common allergens '
-    'from this set (spelled and capitalized as shown in the set): ' + str(STANDARD_ALLERGENS) + '. '
-    'Use "None" if no common allergens are present and "Unknown" if uncertain from the name alone. '
-    'It is better to be overcautious and list "Unknown" than to miss a potential allergen. '
-    'Be conservative with the confidence scores. '
-    'When using "Unknown" or "None", ensure it is the only allergen listed for that item. '
-    'Also for each item, include a confidence score from 1 to 10 (inclusive) on how confident you are in the listed allergens for that item. '
-    'If any item is labeled as "Unknown", the confidence score should be 0. '
-    'If the menu is unreadable (cannot accurately extract 90+% of the items), return a single object array with "__ERROR__" in all properties.'
-)
-gemini_text_prompt = (
-    'Here is a list of menu items: {menu_items}. For each item, identify common allergens '
-    'from this set (spelled and capitalized as shown in the set): {{' + ', '.join(STANDARD_ALLERGENS) + '}}. '
-    'Use "None" if no common allergens are present and "Unknown" if uncertain from the name alone. '
-    'Also for each item, include a confidence score from 1 to 10 (inclusive) on how confident you are in the listed allergens for that item. '
-    'If any item is labeled as unknown, the confidence score should be zero. '
-    'If more than 10% of the menu items are not food items, return a single object array with "__ERROR__" in all properties. Otherwise, '
-    'just set the common allergens to "Unknown" for the odd items.'
-)
+        discard_upload(source)
+
+
+def abandon_menu_job(upload_id, source):
+    """Fail a background job that shutdown dropped or cut short"""
+    discard_upload(source)
+    upload = db.session.get(MenuUpload, upload_id)
+    if upload and upload.status in UPLOAD_IN_PROGRESS_STATUSES:
+        upload.status = UPLOAD_STATUS_FAILED
+        upload.error = 'Menu analysis was interrupted by a server restart'
+        upload.idempotency_key = None
+        bump_data_version(upload.user_id)
+        db.session.commit()
 
 
-# Gemini structured output schemas
-menu_item_schema = types.Schema(
-    type=types.Type.OBJECT,
-    properties={
-        'item_name': types.Schema(
-            type=types.Type.STRING,
-            description='Name of the menu item'
-        ),
-        'common_allergens': types.Schema(
-            type=types.Type.ARRAY,
-            items=types.Schema(type=types.Type.STRING),
-            description='List of common allergens found in this food item'
-        ),
-        'confidence_score': types.Schema(
-            type=types.Type.INTEGER,
-            description='Confidence in the listed allergens for this food item'
-        )
-    },
-    required=['item_name', 'common_allergens', 'confidence_score']
-)
-response_schema = types.Schema(type=types.Type.ARRAY, items=menu_item_schema)
+def analyze_menu_job(upload_id, source):
+    upload = db.session.get(MenuUpload, upload_id)
+    if not upload:
+        return
 
+    def on_stage(stage):
+        upload.status = stage
+        bump_data_version(upload.user_id)
+        db.session.commit()
 
-@llm_bp.route('/process-menu', methods=['POST'])
-@token_required
-def process_menu(current_user):
-    """Process uploaded menu image and extract items with allergens using Gemini"""
+    try:
+        parsed_data, image_encoding = analyze_menu_image(source, on_stage=on_stage)
+    except MenuAnalysisError as e:
+        upload.status = UPLOAD_STATUS_FAILED
+        upload.error = e.message[:500]
+        # Free the key so that retrying the request analyzes the menu again
+        upload.idempotency_key = None
+        bump_data_version(upload.user_id)
+        db.session.commit()
+        return
+    except Exception as e:
+        db.session.rollback()
+        upload.status = UPLOAD_STATUS_FAILED
+        upload.error = f'Menu analysis failed: {str(e)}'[:500]
+        upload.idempotency_key = None
+        bump_data_version(upload.user_id)
+        db.session.commit()
+        return
+
+    upload.set_analysis_result(parsed_data)
+    upload.image_encoding = image_encoding
+    upload.status = UPLOAD_STATUS_COMPLETED
+    bump_data_version(upload.user_id)
+    with stage_timer('db-commit'):
+        db.session.commit()
+    record_size('item_count', len(parsed_data))
+
+
+def image_file_error(image_file):
+    """Return why an uploaded file cannot be analyzed, or None if it is acceptable"""
+    if image_file.filename is None:
+        return 'Invalid file: filename is missing'
+    if not image_file.filename.lower().endswith(ALLOWED_IMAGE_EXTENSIONS):
+        return 'Unsupported file type'
+    return None
+
+
+def validate_menu_image_upload():
+    """Return (image_file, None) for a valid menu image upload or (None, error response)"""
     if 'menu_image' not in request.files:
-        return jsonify({'error': 'No file uploaded'}), 400
+        return None, (jsonify({'error': 'No file uploaded'}), 400)
     image_file = request.files['menu_image']
 
-    upload_name = image_file.filename or 'Untitled Menu'
+    error = image_file_error(image_file)
+    if error:
+        return None, (jsonify({'error': error}), 400)
 
-    if image_file.filename is not None:
-        file_name = image_file.filename.lower()
-    else:
-        return jsonify({'error': 'Invalid file: filename is missing'}), 400
-    allowed_ext = ('.jpg', '.jpeg', '.png', '.heic', '.heif', '.webp')
-    if not file_name.endswith(allowed_ext):
-        return jsonify({'error': 'Unsupported file type'}), 400
+    return image_file, None
 
-    processed_image = None
-    try:
-        processed_image = preprocess_image(image_file)
-        image_bytes = image_to_bytes(processed_image)
-    except Exception as e:
-        return jsonify({'error': f'Image processing failed: {str(e)}'}), 500
-    finally:
-        if processed_image is not None:
-            processed_image.close()
-
-    client = genai.Client()
-    response = client.models.generate_content(
-        model='gemini-2.5-flash',
-        contents=[
-            gemini_image_prompt,
-            types.Part.from_bytes(
-                data=image_bytes,
-                mime_type='image/jpeg'
-            )
-        ],
-        config={
-            'response_mime_type': 'application/json',
-            'response_schema': response_schema,
-            'temperature': 0
+
+def menu_job_response(menu_upload, replayed=False):
+    status_url = url_for('llm.get_menu_upload_status', upload_id=menu_upload.id)
+    response = jsonify(
+        {
+            'job_id': menu_upload.id,
+            'status': menu_upload.status,
+            'status_url': status_url,
         }
     )
+    response.headers['Location'] = status_url
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response, 202
 
-    if response.text:
-        parsed_data = json.loads(response.text)
 
-        if (
-            parsed_data
-            and len(parsed_data) > 0
-            and parsed_data[0].get('item_name') == '__ERROR__'
-        ):
-            return jsonify({'error': 'Menu image is too blurry or unreadable'}), 400
+def enqueue_menu_job(current_user, upload_name, image_file, idempotency_key=None):
+    """Persist a pending upload and hand the image to the background workers"""
+    if idempotency_key:
+        existing = find_idempotent_upload(current_user.id, idempotency_key)
+        if existing is not None:
+            return menu_job_response(existing, replayed=True)
 
-        try:
-            menu_upload = MenuUpload(
-                user_id=current_user.id,
-                upload_name=upload_name.strip(),
-                analysis_result=parsed_data
-            )
-            db.session.add(menu_upload)
-            db.session.commit()
-            return jsonify(parsed_data), 200
-        except Exception as e:
-            db.session.rollback()
+    # The request's spooled file is removed when it ends, so the job keeps its own copy
+    source = keep_upload(image_file)
+
+    try:
+        menu_upload = MenuUpload(
+            user_id=current_user.id,
+            upload_name=upload_name.strip(),
+            analysis_result=[],
+            status=UPLOAD_STATUS_PENDING,
+            idempotency_key=idempotency_key,
+        )
+        db.session.add(menu_upload)
+        bump_data_version(current_user.id)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        discard_upload(source)
+        existing = find_idempotent_upload(current_user.id, idempotency_key) if idempotency_key else None
+        if existing is None:
             return jsonify({'error': f'Failed to save menu upload: {str(e)}'}), 500
+        return menu_job_response(existing, replayed=True)
+    except Exception as e:
+        db.session.rollback()
+        discard_upload(source)
+        return jsonify({'error': f'Failed to save menu upload: {str(e)}'}), 500
 
-    else:
-        return jsonify({'error': 'No response from Gemini'}), 500
+    try:
+        get_job_queue().submit(
+            run_menu_job, menu_upload.id, source, on_abandon=abandon_menu_job
+        )
+    except JobQueueFull:
+        # The job never started, so it should not show up anywhere
+        discard_upload(source)
+        db.session.delete(menu_upload)
+        bump_data_version(current_user.id)
+        db.session.commit()
+        return jsonify({'error': 'Too many menus are being analyzed, please try again shortly'}), 503
+    return menu_job_response(menu_upload)
 
 
-@llm_bp.route('/process-manual-input', methods=['POST'])
+@llm_bp.route('/process-menu', methods=['POST'])
 @token_required
-def process_manual(current_user):
-    """Parse and send a list of menu items to Gemini for processing"""
-    data = request.get_json()
-    if not data:
-        return jsonify({'error': 'No json body provided'}), 400
+def process_menu(current_user):
+    """Process uploaded menu image and extract items with allergens using Gemini"""
+    image_file, error_response = validate_menu_image_upload()
+    if error_response:
+        return error_response
+
+    idempotency_key, error_response = idempotency_key_header()
+    if error_response:
+        return error_response
+
+    upload_name = image_file.filename or 'Untitled Menu'
+
+    if request.args.get('async', 'false').lower() in ('1', 'true', 'yes'):
+        return enqueue_menu_job(current_user, upload_name, image_file, idempotency_key)
+
+    source = upload_source(image_file)
+    fingerprint = upload_sha256(image_file, prefix=upload_name.encode() + b'\0')
+    return process_once(
+        current_user,
+        upload_name,
+        lambda: analyze_menu_image(source),
+        fingerprint,
+        idempotency_key,
+    )
 
+
+def parse_manual_menu(data):
+    """Return (menu_items, upload_name, None) for a valid manual menu or (None, None, error)"""
     menu_items = data.get('menu_items')
     if not menu_items:
-        return jsonify({'error': 'No menu_items field was was provided'}), 400
+        return None, None, 'No menu_items field was was provided'
     if not isinstance(menu_items, list):
-        return jsonify({'error': 'menu_items must contain a list'}), 400
+        return None, None, 'menu_items must contain a list'
     stripped_menu_items = [item.strip() for item in menu_items if isinstance(item, str)]
     if len(menu_items) != len(stripped_menu_items):
-        return jsonify({'error': 'Menu items must be strings'}), 400
+        return None, None, 'Menu items must be strings'
 
     upload_name = data.get('menu_name', 'Untitled Manual Menu Input')
+    if not isinstance(upload_name, str):
+        return None, None, 'menu_name must be a string'
     if upload_name.strip() == '':
         upload_name = 'Untitled Manual Menu Input'
 
-    client = genai.Client()
-    response = client.models.generate_content(
-        model='gemini-2.5-flash',
-        contents=gemini_text_prompt.format(menu_items=', '.join(stripped_menu_items)),
-        config={
-            'response_mime_type': 'application/json',
-            'response_schema': response_schema,
-            'temperature': 0
-        },
+    return stripped_menu_items, upload_name, None
+
+
+def validate_manual_input():
+    """Return (menu_items, upload_name, None) for a valid body or (None, None, error response)"""
+    data = request.get_json()
+    if not data:
+        return None, None, (jsonify({'error': 'No json body provided'}), 400)
+    if not isinstance(data, dict):
+        return None, None, (jsonify({'error': 'The json body must be an object'}), 400)
+
+    menu_items, upload_name, error = parse_manual_menu(data)
+    if error:
+        return None, None, (jsonify({'error': error}), 400)
+
+    return menu_items, upload_name, None
+
+
+def analyze_manual_menu(menu_items):
+    """Counterpart of analyze_menu_image for manual menus, which have no image encoding"""
+    return analyze_menu_items(menu_items), None
+
+
+@llm_bp.route('/process-manual-input', methods=['POST'])
+@token_required
+def process_manual(current_user):
+    """Parse and send a list of menu items to Gemini for processing"""
+    menu_items, upload_name, error_response = validate_manual_input()
+    if error_response:
+        return error_response
+
+    idempotency_key, error_response = idempotency_key_header()
+    if error_response:
+        return error_response
+
+    fingerprint = hashlib.sha256(json.dumps([upload_name, menu_items]).encode()).hexdigest()
+    return process_once(
+        current_user,
+        upload_name,
+        lambda: analyze_manual_menu(menu_items),
+        fingerprint,
+        idempotency_key,
     )
 
-    if response.text:
-        parsed_data = json.loads(response.text)
-        if (
-            parsed_data
-            and len(parsed_data) > 0
-            and parsed_data[0].get('item_name') == '__ERROR__'
-        ):
-            return jsonify({'error': 'Invalid menu items'}), 400
+
+@llm_bp.route('/process-menu/batch', methods=['POST'])
+@token_required
+def process_menu_batch(current_user):
+    """Analyze several menu images or manual menus in one call, saving them together"""
+    max_items = current_app.config['MENU_BATCH_MAX_ITEMS']
+
+    # Each entry is (upload_name, analyze function, argument) or (upload_name, error)
+    entries = []
+    if request.files:
+        image_files = request.files.getlist('menu_images')
+        if not image_files:
+            return jsonify({'error': 'No files uploaded in menu_images'}), 400
+        if len(image_files) > max_items:
+            return jsonify({'error': f'A batch can contain at most {max_items} menus'}), 400
+        for image_file in image_files:
+            upload_name = image_file.filename or 'Untitled Menu'
+            error = image_file_error(image_file)
+            if error:
+                entries.append((upload_name, None, error))
+            else:
+                entries.append((upload_name, analyze_menu_image, upload_source(image_file)))
+    else:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('menus'), list) or not data['menus']:
+            return jsonify({'error': 'Provide menu_images files or a json menus list'}), 400
+        if len(data['menus']) > max_items:
+            return jsonify({'error': f'A batch can contain at most {max_items} menus'}), 400
+        for menu in data['menus']:
+            if not isinstance(menu, dict):
+                entries.append(('Untitled Manual Menu Input', None, 'Each menu must be an object'))
+                continue
+            menu_items, upload_name, error = parse_manual_menu(menu)
+            if error:
+                entries.append((upload_name or 'Untitled Manual Menu Input', None, error))
+            else:
+                entries.append((upload_name, analyze_manual_menu, menu_items))
+
+    runnable = [(fn, arg) for _, fn, arg in entries if fn is not None]
+    outcomes = iter(
+        map_in_app_context(
+            lambda task: task[0](task[1]),
+            runnable,
+            current_app.config['LLM_MAX_CONCURRENCY'],
+        )
+    )
+
+    matcher = load_user_matcher(current_user.id)
+    results = []
+    uploads = []
+    for index, (upload_name, fn, arg) in enumerate(entries):
+        result = {'index': index, 'upload_name': upload_name.strip()}
+        if fn is None:
+            result.update({'status': UPLOAD_STATUS_FAILED, 'error': arg, 'status_code': 400})
+        else:
+            analysis, error = next(outcomes)
+            if error is None:
+                parsed_data, image_encoding = analysis
+                menu_upload = MenuUpload(
+                    user_id=current_user.id,
+                    upload_name=upload_name.strip(),
+                    analysis_result=parsed_data,
+                    image_encoding=image_encoding,
+                )
+                uploads.append((result, menu_upload))
+                result.update(
+                    {'status': UPLOAD_STATUS_COMPLETED, 'analysis_result': matcher.annotate(parsed_data)}
+                )
+            elif isinstance(error, MenuAnalysisError):
+                result.update({'status': UPLOAD_STATUS_FAILED, 'error': error.message, 'status_code': error.status_code})
+            else:
+                result.update({'status': UPLOAD_STATUS_FAILED, 'error': f'Menu analysis failed: {str(error)}', 'status_code': 500})
+        results.append(result)
+
+    if uploads:
+        try:
+            db.session.add_all([menu_upload for _, menu_upload in uploads])
+            bump_data_version(current_user.id)
+            with stage_timer('db-commit'):
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': f'Failed to save menu uploads: {str(e)}'}), 500
+        for result, menu_upload in uploads:
+            result['upload_id'] = menu_upload.id
+            record_size('item_count', len(menu_upload.analysis_result))
+
+    failed = len(results) - len(uploads)
+    return jsonify(
+        {'completed': len(uploads), 'failed': failed, 'results': results}
+    ), 207 if failed else 200
+
+
+def sse_event(event, data):
+    """Format a single Server-Sent Events message"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def stream_menu_upload(user_id, upload_name, items, image_encoding=None):
+    """Stream items as SSE events, then save the complete upload and report its id"""
+    matcher = load_user_matcher(user_id)
+
+    def generate():
+        parsed_data = []
+        try:
+            for item in items:
+                parsed_data.append(item)
+                yield sse_event('item', matcher.annotate([item])[0])
+        except MenuAnalysisError as e:
+            yield sse_event('error', {'error': e.message, 'status': e.status_code})
+            return
+        except Exception as e:
+            yield sse_event('error', {'error': f'Menu analysis failed: {str(e)}', 'status': 500})
+            return
 
         try:
             menu_upload = MenuUpload(
-                user_id=current_user.id,
+                user_id=user_id,
                 upload_name=upload_name.strip(),
-                analysis_result=parsed_data
+                analysis_result=parsed_data,
+                image_encoding=image_encoding,
             )
             db.session.add(menu_upload)
+            bump_data_version(user_id)
             db.session.commit()
-            return jsonify(parsed_data), 200
         except Exception as e:
             db.session.rollback()
-            return jsonify({'error': f'Failed to save menu upload: {str(e)}'}), 500
+            yield sse_event('error', {'error': f'Failed to save menu upload: {str(e)}', 'status': 500})
+            return
 
-    else:
-        return jsonify({'error': 'No response from Gemini'}), 500
+        yield sse_event('done', {'upload_id': menu_upload.id, 'item_count': len(parsed_data)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@llm_bp.route('/process-menu/stream', methods=['POST'])
+@token_required
+def process_menu_stream(current_user):
+    """Process a menu image, streaming each extracted item as a Server-Sent Event"""
+    image_file, error_response = validate_menu_image_upload()
+    if error_response:
+        return error_response
+
+    upload_name = image_file.filename or 'Untitled Menu'
+
+    try:
+        image = prepare_menu_image(upload_source(image_file))
+    except MenuAnalysisError as e:
+        return jsonify({'error': e.message}), e.status_code
+
+    return stream_menu_upload(
+        current_user.id, upload_name, stream_menu_image(image), image.encoding
+    )
+
+
+@llm_bp.route('/process-manual-input/stream', methods=['POST'])
+@token_required
+def process_manual_stream(current_user):
+    """Classify manually entered menu items, streaming each one as a Server-Sent Event"""
+    menu_items, upload_name, error_response = validate_manual_input()
+    if error_response:
+        return error_response
+
+    return stream_menu_upload(current_user.id, upload_name, stream_menu_items(menu_items))
 
 
 @llm_bp.route('/menu-uploads', methods=['GET'])
 @token_required
+@conditional_user_get
 def get_menu_uploads(current_user):
-    """Get all menu uploads for the authenticated user with optional limit"""
+    """Get menu uploads for the authenticated user, newest first, with keyset pagination"""
     limit = request.args.get('limit', type=int)
+    summary = request.args.get('fields') == 'summary'
+
+    try:
+        after = parse_cursor_arg(request.args.get('cursor'))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+
+    allergen_filter, unrecognized = parse_allergen_list(request.args.get('allergens'))
+    if unrecognized:
+        return jsonify({'error': f'Unknown allergens: {", ".join(unrecognized)}'}), 400
 
     try:
         stmt = (
             select(MenuUpload)
-            .filter_by(user_id=current_user.id)
-            .order_by(MenuUpload.created_at.desc())
+            .filter_by(user_id=current_user.id, status=UPLOAD_STATUS_COMPLETED)
+            .order_by(MenuUpload.created_at.desc(), MenuUpload.id.desc())
         )
 
-        if limit is not None and limit > 0:
-            stmt = stmt.limit(limit)
+        if summary:
+            stmt = stmt.options(defer(MenuUpload.analysis_result))
+
+        if after is not None:
+            stmt = stmt.where(tuple_(MenuUpload.created_at, MenuUpload.id) < after)
+
+        if allergen_filter:
+            stmt = stmt.where(
+                exists().where(
+                    MenuItem.upload_id == MenuUpload.id,
+                    allergen_mask_clause(MenuItem.allergen_mask, allergen_filter),
+                )
+            )
+
+        paginated = limit is not None and limit > 0
+        if paginated:
+            # Fetch one extra row to learn whether another page exists
+            stmt = stmt.limit(limit + 1)
 
         uploads = db.session.scalars(stmt).all()
 
-        return jsonify([upload.to_dict() for upload in uploads]), 200
+        next_cursor = None
+        if paginated and len(uploads) > limit:
+            uploads = uploads[:limit]
+            next_cursor = encode_cursor(uploads[-1].created_at, uploads[-1].id)
+
+        if summary:
+            response = jsonify([upload.to_summary_dict() for upload in uploads])
+        else:
+            matcher = load_user_matcher(current_user.id)
+            response = jsonify([annotated_upload(upload, matcher) for upload in uploads])
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
     except Exception as e:
         return jsonify({'error': f'Failed to retrieve menu uploads: {str(e)}'}), 500
 
 
+@llm_bp.route('/menu-uploads/search', methods=['GET'])
+@token_required
+def search_menu_uploads(current_user):
+    """Full-text search over item and upload names in the user's menu history"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+
+    limit = request.args.get('limit', 50, type=int)
+    limit = min(max(limit, 1), 200)
+
+    try:
+        results = []
+        for menu_item, upload, rank in search_menu_items(current_user.id, query, limit):
+            item = menu_item.to_dict()
+            item['upload_name'] = upload.upload_name
+            item['upload_created_at'] = upload.created_at.isoformat()
+            item['rank'] = rank
+            results.append(item)
+
+        return jsonify(results), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to search menu uploads: {str(e)}'}), 500
+
+
 @llm_bp.route('/menu-uploads/<int:upload_id>', methods=['GET'])
 @token_required
+@conditional_user_get
 def get_menu_upload(current_user, upload_id):
     """Get a specific menu upload by ID"""
     try:
@@ -263,11 +664,49 @@ def get_menu_upload(current_user, upload_id):
         if not upload:
             return jsonify({'error': 'Menu upload not found'}), 404
 
-        return jsonify(upload.to_dict()), 200
+        return jsonify(annotated_upload(upload, load_user_matcher(current_user.id))), 200
     except Exception as e:
         return jsonify({'error': f'Failed to retrieve menu upload: {str(e)}'}), 500
 
 
+@llm_bp.route('/menu-uploads/<int:upload_id>/status', methods=['GET'])
+@token_required
+def get_menu_upload_status(current_user, upload_id):
+    """Report the progress of a background menu analysis job"""
+    try:
+        stmt = select(MenuUpload).filter_by(id=upload_id, user_id=current_user.id)
+        upload = db.session.execute(stmt).scalar_one_or_none()
+
+        if not upload:
+            return jsonify({'error': 'Menu upload not found'}), 404
+
+        # Jobs lost to a worker restart never finish; report them as failed
+        timeout = timedelta(seconds=current_app.config['MENU_JOB_TIMEOUT'])
+        created_at = upload.created_at.replace(tzinfo=timezone.utc)
+        if (
+            upload.status in UPLOAD_IN_PROGRESS_STATUSES
+            and datetime.now(timezone.utc) - created_at > timeout
+        ):
+            upload.status = UPLOAD_STATUS_FAILED
+            upload.error = 'Menu analysis timed out'
+            bump_data_version(current_user.id)
+            db.session.commit()
+
+        job_status = {
+            'job_id': upload.id,
+            'status': upload.status,
+            'progress': JOB_PROGRESS.get(upload.status, 0.0),
+            'error': upload.error,
+        }
+        if upload.status == UPLOAD_STATUS_COMPLETED:
+            job_status['upload'] = annotated_upload(upload, load_user_matcher(current_user.id))
+
+        return jsonify(job_status), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to retrieve job status: {str(e)}'}), 500
+
+
 @llm_bp.route('/menu-uploads/<int:upload_id>', methods=['PUT'])
 @token_required
 def rename_menu_upload(current_user, upload_id):
@@ -289,6 +728,7 @@ def rename_menu_upload(current_user, upload_id):
             return jsonify({'error': 'Menu upload not found'}), 404
 
         upload.upload_name = new_name
+        bump_data_version(current_user.id)
         db.session.commit()
 
         return jsonify(upload.to_dict()), 200
@@ -309,6 +749,7 @@ def delete_menu_upload(current_user, upload_id):
             return jsonify({'error': 'Menu upload not found'}), 404
 
         db.session.delete(upload)
+        bump_data_version(current_user.id)
         db.session.commit()
 
         return jsonify({'message': 'Menu upload deleted successfully'}), 200
@@ -0,0 +1,66 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import UPLOAD_STATUS_COMPLETED, MenuItem, MenuUpload
+from app.utils.allergen_matcher import (
+    ALLERGEN_MATCH_MODES,
+    allergen_mask_clause,
+    parse_allergen_list,
+)
+from app.utils.jwt_utils import token_required
+
+menu_item_bp = Blueprint('menu_item', __name__)
+
+
+@menu_item_bp.route('/menu-items', methods=['GET'])
+@token_required
+def get_menu_items(current_user):
+    """Query the user's analyzed menu items by allergen and confidence"""
+    mask, unrecognized = parse_allergen_list(request.args.get('allergens'))
+    if unrecognized:
+        return jsonify({'error': f'Unknown allergens: {", ".join(unrecognized)}'}), 400
+
+    match = request.args.get('match', 'any')
+    if match not in ALLERGEN_MATCH_MODES:
+        return jsonify(
+            {'error': f'match must be one of: {", ".join(ALLERGEN_MATCH_MODES)}'}
+        ), 400
+
+    min_confidence = request.args.get('min_confidence', type=int)
+    max_confidence = request.args.get('max_confidence', type=int)
+    upload_id = request.args.get('upload_id', type=int)
+    limit = request.args.get('limit', type=int)
+
+    try:
+        stmt = (
+            select(MenuItem, MenuUpload.upload_name, MenuUpload.created_at)
+            .join(MenuItem.upload)
+            .where(
+                MenuItem.user_id == current_user.id,
+                MenuUpload.status == UPLOAD_STATUS_COMPLETED,
+            )
+            .order_by(MenuUpload.created_at.desc(), MenuItem.upload_id.desc(), MenuItem.position)
+        )
+
+        if mask:
+            stmt = stmt.where(allergen_mask_clause(MenuItem.allergen_mask, mask, match))
+        if min_confidence is not None:
+            stmt = stmt.where(MenuItem.confidence_score >= min_confidence)
+        if max_confidence is not None:
+            stmt = stmt.where(MenuItem.confidence_score <= max_confidence)
+        if upload_id is not None:
+            stmt = stmt.where(MenuItem.upload_id == upload_id)
+        if limit is not None and limit > 0:
+            stmt = stmt.limit(limit)
+
+        items = []
+        for menu_item, upload_name, created_at in db.session.execute(stmt):
+            item = menu_item.to_dict()
+            item['upload_name'] = upload_name
+            item['upload_created_at'] = created_at.isoformat()
+            items.append(item)
+
+        return jsonify(items), 200
+    except Exception as e:
+        return jsonify({'error': f'Failed to retrieve menu items: {str(e)}'}), 500
@@ -0,0 +1,113 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import ColumnElement, select
+
+from app.extensions import db
+from app.models import ALLERGEN_BITS, UserAllergy, allergen_mask
+from app.utils.allergen_registry import get_allergen_registry
+
+SEVERITY_LEVELS = ('none', 'mild', 'moderate', 'severe')
+UNKNOWN_ALLERGEN = 'Unknown'
+
+MASK_SIZE = 1 << len(ALLERGEN_BITS)
+ALLERGEN_NAMES_BY_BIT = {bit: name for name, bit in ALLERGEN_BITS.items()}
+
+
+ALLERGEN_MATCH_MODES = ('any', 'all', 'none')
+
+
+def parse_allergen_list(value: Optional[str]) -> Tuple[int, List[str]]:
+    """Parse a comma-separated allergen list into (mask, unrecognized names)"""
+    mask = 0
+    unrecognized = []
+    for name in (value or '').split(','):
+        name = name.strip()
+        if not name:
+            continue
+        bit = allergen_mask([name])
+        if bit:
+            mask |= bit
+        else:
+            unrecognized.append(name)
+    return mask, unrecognized
+
+
+def allergen_mask_clause(column, mask: int, match: str = 'any') -> ColumnElement[bool]:
+    """SQL condition comparing an allergen bitmask column with mask"""
+    overlap = column.op('&')(mask)
+    if match == 'all':
+        return overlap == mask
+    if match == 'none':
+        return overlap == 0
+    return overlap != 0
+
+
+class AllergenMatcher:
+    """Scores menu items against one user's allergies through a precomputed lookup table"""
+
+    def __init__(self, severities: Dict[str, int]):
+        severity_by_bit = {}
+        for name, severity in severities.items():
+            bit = allergen_mask([name])
+            if bit:
+                severity_by_bit[bit] = severity
+
+        # Entry m holds (score, worst severity, matched names) for item mask m.
+        # Each entry extends the one without its lowest set bit, so the whole
+        # table costs MASK_SIZE steps and scoring an item is a single lookup.
+        table: List[Tuple[int, int, Tuple[str, ...]]] = [(0, 0, ())] * MASK_SIZE
+        for mask in range(1, MASK_SIZE):
+            lowest_bit = mask & -mask
+            score, worst, matched = table[mask ^ lowest_bit]
+            severity = severity_by_bit.get(lowest_bit)
+            if severity:
+                table[mask] = (
+                    score + severity,
+                    max(worst, severity),
+                    (ALLERGEN_NAMES_BY_BIT[lowest_bit],) + matched,
+                )
+            else:
+                table[mask] = (score, worst, matched)
+        self._table = table
+
+    def score_masks(self, masks: Iterable[int]) -> List[Tuple[int, int, Tuple[str, ...]]]:
+        """Score many item masks at once"""
+        table = self._table
+        return [table[mask] for mask in masks]
+
+    def annotate(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return copies of analysis items with risk_score, risk_level and matched_allergens"""
+        allergen_lists = [item.get('common_allergens') or [] for item in items]
+        scores = self.score_masks(allergen_mask(names) for names in allergen_lists)
+
+        annotated = []
+        for item, names, (score, worst, matched) in zip(items, allergen_lists, scores):
+            if not matched and UNKNOWN_ALLERGEN in names:
+                level = 'unknown'
+            else:
+                level = SEVERITY_LEVELS[worst]
+            annotated.append(
+                {
+                    **item,
+                    'risk_score': score,
+                    'risk_level': level,
+                    'matched_allergens': list(matched),
+                }
+            )
+        return annotated
+
+
+def load_user_matcher(user_id: int) -> AllergenMatcher:
+    """Build the matcher for a user's saved allergies in a single query"""
+    stmt = select(UserAllergy.allergen_id, UserAllergy.severity).where(
+        UserAllergy.user_id == user_id
+    )
+    registry = get_allergen_registry()
+    return AllergenMatcher(
+        {registry.name_for(allergen_id): severity for allergen_id, severity in db.session.execute(stmt)}
+    )
+
+
+def annotate_for_user(user_id: int, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Risk-annotate analysis items for a user"""
+    return load_user_matcher(user_id).annotate(items)
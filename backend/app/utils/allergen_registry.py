@@ -0,0 +1,65 @@
+import threading
+from typing import Dict, Optional
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import STANDARD_ALLERGENS, Allergen
+
+
+class AllergenRegistry:
+    """In-memory allergen name <-> id map, so requests never query the allergens table"""
+
+    def __init__(self):
+        self._ids_by_name: Dict[str, int] = {}
+        self._names_by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read the allergens table, seeding the standard allergens if it is empty"""
+        if not self.refresh():
+            try:
+                db.session.add_all([Allergen(name=name) for name in sorted(STANDARD_ALLERGENS)])
+                db.session.commit()
+            except IntegrityError:
+                # Another worker process seeded the table first
+                db.session.rollback()
+            self.refresh()
+
+    def refresh(self) -> int:
+        """Reload the map from the database, returning the number of allergens"""
+        rows = db.session.execute(select(Allergen.id, Allergen.name)).all()
+        with self._lock:
+            # Swap whole dicts so readers never see a half-built map
+            self._ids_by_name = {name: allergen_id for allergen_id, name in rows}
+            self._names_by_id = {allergen_id: name for allergen_id, name in rows}
+        return len(rows)
+
+    def id_for(self, name: str) -> Optional[int]:
+        allergen_id = self._ids_by_name.get(name)
+        if allergen_id is None:
+            # Allergens added since startup are picked up on first use
+            self.refresh()
+            allergen_id = self._ids_by_name.get(name)
+        return allergen_id
+
+    def name_for(self, allergen_id: int) -> Optional[str]:
+        name = self._names_by_id.get(allergen_id)
+        if name is None:
+            self.refresh()
+            name = self._names_by_id.get(allergen_id)
+        return name
+
+
+def init_allergen_registry(app) -> None:
+    """Load the allergen registry for this app; call after create_all"""
+    registry = AllergenRegistry()
+    with app.app_context():
+        registry.load()
+    app.extensions['allergen_registry'] = registry
+
+
+def get_allergen_registry() -> AllergenRegistry:
+    return current_app.extensions['allergen_registry']
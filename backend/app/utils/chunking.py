@@ -0,0 +1,38 @@
+import math
+from typing import List
+
+# Rough size of English text in Gemini tokens; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Structured output repeats the keys, allergen list and score for every item
+OUTPUT_TOKENS_PER_ITEM = 24
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate how many tokens text occupies"""
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def estimate_item_tokens(item_name: str) -> int:
+    """Estimate the prompt and response tokens one menu item costs"""
+    # The name appears once in the prompt and once in the response
+    return 2 * estimate_tokens(item_name) + OUTPUT_TOKENS_PER_ITEM
+
+
+def chunk_menu_items(menu_items: List[str], max_tokens: int) -> List[List[str]]:
+    """Split menu items into consecutive batches that each fit in max_tokens"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for item in menu_items:
+        item_tokens = estimate_item_tokens(item)
+        if current and current_tokens + item_tokens > max_tokens:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append(item)
+        current_tokens += item_tokens
+
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+
+from app.extensions import db
+from app.utils.metrics import request_timings, use_request_timings
+
+
+def map_in_app_context(
+    fn: Callable[[Any], Any], items: Sequence[Any], max_workers: int
+) -> List[Tuple[Any, Optional[Exception]]]:
+    """Run fn over items on a bounded thread pool, returning (result, error) pairs in order"""
+    if not items:
+        return []
+
+    app = current_app._get_current_object()
+    timings = request_timings()
+
+    def run(item):
+        with app.app_context():
+            use_request_timings(timings)
+            try:
+                return fn(item), None
+            except Exception as e:
+                db.session.rollback()
+                return None, e
+            finally:
+                db.session.remove()
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(items))),
+        thread_name_prefix='fan-out',
+    ) as executor:
+        return list(executor.map(run, items))
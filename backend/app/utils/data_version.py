@@ -0,0 +1,39 @@
+from functools import wraps
+
+from flask import make_response, request
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import User
+
+
+def bump_data_version(user_id: int) -> None:
+    """Mark the user's data as changed; runs in the caller's transaction, which must commit"""
+    db.session.execute(
+        update(User).where(User.id == user_id).values(data_version=User.data_version + 1)
+    )
+
+
+def conditional_user_get(f):
+    """Decorator (under token_required) that ETags responses by data version and answers 304 on a match"""
+
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        # Read before the view runs, so a concurrent write can only make the tag older.
+        # This loads the User row, which views serializing the user (/auth/me) then reuse
+        # instead of a per-process cached copy that may not match the version
+        etag = f'{current_user.id}.{current_user.data_version}'
+
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(f(current_user, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        # Let browsers keep the body but always revalidate it
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return decorated
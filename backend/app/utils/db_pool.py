@@ -0,0 +1,114 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Checkouts that wait longer than this are logged with the pool state
+SLOW_CHECKOUT_SECONDS = 0.1
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long requests wait for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            self._record_wait(time.perf_counter() - start)
+
+    def _record_wait(self, waited: float) -> None:
+        with self._stats_lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if waited >= SLOW_CHECKOUT_SECONDS:
+                self.slow_checkouts += 1
+                slow = True
+            else:
+                slow = False
+        if slow:
+            logger.warning(
+                f'Slow database pool checkout: waited {waited * 1000:.0f} ms '
+                f'(checked out={self.checkedout()}, overflow={self.overflow()}, size={self.size()})'
+            )
+
+    def wait_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'slow_checkouts': self.slow_checkouts,
+                'avg_wait_ms': self.total_wait / self.checkouts * 1000 if self.checkouts else 0.0,
+                'max_wait_ms': self.max_wait * 1000,
+            }
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Let readers proceed while an upload is being written, at a small durability cost"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        # In-memory databases report 'memory' and keep their journal mode
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+    finally:
+        cursor.close()
+
+
+def init_db_pool(app) -> None:
+    """Use the instrumented pool for this app's engine; call before db.init_app"""
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    # Options without a pool size are for in-memory SQLite, which needs StaticPool
+    if 'pool_size' in options:
+        options.setdefault('poolclass', TimedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def release_connection() -> None:
+    """End this context's read-only transaction so its pooled connection is free during slow I/O"""
+    session = db.session()
+    if session.in_transaction() and not (session.new or session.dirty or session.deleted):
+        session.commit()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Connection pool occupancy and checkout wait times for this process"""
+    pool = db.engine.pool
+    stats: Dict[str, Any] = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+            }
+        )
+    if isinstance(pool, TimedQueuePool):
+        stats.update(pool.wait_stats())
+    return stats
@@ -0,0 +1,89 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from flask import current_app
+from google import genai
+from google.genai import types
+
+
+class GenaiClientRegistry:
+    """Process-wide genai.Client shared by all requests, with connection reuse metrics"""
+
+    def __init__(self, config):
+        self.api_key = config.get('GEMINI_API_KEY')
+        self.http_options = types.HttpOptions(
+            base_url=config.get('GEMINI_BASE_URL'),
+            timeout=int(config['GEMINI_TIMEOUT'] * 1000),
+            retry_options=types.HttpRetryOptions(
+                attempts=config['GEMINI_RETRY_ATTEMPTS'],
+                initial_delay=config['GEMINI_RETRY_INITIAL_DELAY'],
+                max_delay=config['GEMINI_RETRY_MAX_DELAY'],
+            ),
+            client_args={
+                'limits': httpx.Limits(
+                    max_connections=config['GEMINI_MAX_CONNECTIONS'],
+                    max_keepalive_connections=config['GEMINI_MAX_CONNECTIONS'],
+                    keepalive_expiry=config['GEMINI_KEEPALIVE_EXPIRY'],
+                ),
+                'event_hooks': {'request': [self._on_request]},
+            },
+        )
+        self._client: Optional[genai.Client] = None
+        self._client_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.clients_created = 0
+        self.http_requests = 0
+        self.new_connections = 0
+
+    def _on_request(self, request: httpx.Request) -> None:
+        # httpcore reports TCP connects through the trace extension, and only
+        # does so when no pooled keep-alive connection could be reused
+        with self._lock:
+            self.http_requests += 1
+        request.extensions['trace'] = self._on_trace
+
+    def _on_trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == 'connection.connect_tcp.started':
+            with self._lock:
+                self.new_connections += 1
+
+    def get_client(self) -> genai.Client:
+        """Return the shared client, creating it on first use in this process"""
+        pid = os.getpid()
+        if self._client is None or self._client_pid != pid:
+            with self._lock:
+                # Connection pools must not be shared with forked gunicorn workers
+                if self._client is None or self._client_pid != pid:
+                    self._client = genai.Client(
+                        api_key=self.api_key, http_options=self.http_options
+                    )
+                    self._client_pid = pid
+                    self.clients_created += 1
+        return self._client
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(self.http_requests - self.new_connections, 0)
+            return {
+                'clients_created': self.clients_created,
+                'http_requests': self.http_requests,
+                'new_connections': self.new_connections,
+                'reused_connections': reused,
+                'reuse_ratio': reused / self.http_requests if self.http_requests else 0.0,
+            }
+
+
+def init_genai_client(app) -> None:
+    """Create the shared Gemini client registry for this app"""
+    app.extensions['genai_client'] = GenaiClientRegistry(app.config)
+
+
+def get_genai_client() -> genai.Client:
+    return current_app.extensions['genai_client'].get_client()
+
+
+def get_genai_registry() -> GenaiClientRegistry:
+    return current_app.extensions['genai_client']
@@ -0,0 +1,216 @@
+import io
+
+import pillow_heif
+from PIL import Image, ImageEnhance, ImageFilter, ImageOps, ImageStat
+
+pillow_heif.register_heif_opener()
+
+# Resampling settings for the fast pipeline; 'quality' uses preprocess_image unchanged
+PREPROCESS_PROFILES = {
+    'balanced': {'resample': Image.Resampling.BICUBIC, 'reducing_gap': 3.0},
+    'fast': {'resample': Image.Resampling.BILINEAR, 'reducing_gap': 2.0},
+}
+
+# Formats the encoder may send to Gemini: PIL format name and MIME type
+ENCODE_FORMATS = {
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+CONTRAST_FACTOR = 1.2
+SHARPNESS_FACTOR = 1.3
+
+# ImageFilter.SMOOTH, which ImageEnhance.Sharpness blends against
+SMOOTH_KERNEL = (1, 1, 1, 1, 5, 1, 1, 1, 1)
+
+
+class ImageTooLarge(ValueError):
+    """Raised when an image has more pixels than may be decoded"""
+
+
+def open_image(image_file, max_pixels=None):
+    """Open an image lazily, rejecting it from its header if it has more than max_pixels"""
+    img = Image.open(image_file)
+    width, height = img.size
+    if max_pixels and width * height > max_pixels:
+        img.close()
+        raise ImageTooLarge(
+            f'Image is too large ({width}x{height}); at most {max_pixels // 1_000_000} megapixels are allowed'
+        )
+    return img
+
+
+def preprocess_image(image_file, max_size=1536, enhance=True, max_pixels=None):
+    """Preprocess and optimize image for Gemini processing"""
+    img = open_image(image_file, max_pixels)
+
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    try:
+        img = ImageOps.exif_transpose(img)
+    except Exception:
+        pass
+
+    if max(img.size) > max_size:
+        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+    if enhance:
+        enhancer = ImageEnhance.Contrast(img)
+        img = enhancer.enhance(1.2)
+
+        enhancer = ImageEnhance.Sharpness(img)
+        img = enhancer.enhance(1.3)
+
+    return img
+
+
+def image_to_bytes(img, format='JPEG', quality=75):
+    """Convert PIL Image to bytes for API transmission"""
+    buffer = io.BytesIO()
+    try:
+        img.save(buffer, format=format, quality=quality, optimize=True)
+        buffer.seek(0)
+        return buffer.getvalue()
+    finally:
+        buffer.close()
+
+
+def encode_image(img, format='JPEG', quality=75, grayscale=False):
+    """Encode a PIL Image at a given quality, optionally as grayscale"""
+    if grayscale and img.mode != 'L':
+        img = img.convert('L')
+    buffer = io.BytesIO()
+    try:
+        # Huffman optimization costs a few ms and saves about a third of a JPEG's bytes
+        img.save(buffer, format=format, quality=quality, optimize=True)
+        return buffer.getvalue()
+    finally:
+        buffer.close()
+
+
+def encode_for_budget(img, max_bytes, format='JPEG', min_quality=40, max_quality=75, grayscale=False):
+    """Encode at the highest quality in [min_quality, max_quality] that fits in max_bytes"""
+    if grayscale and img.mode != 'L':
+        # Convert once instead of on every trial encode
+        img = img.convert('L')
+
+    data = encode_image(img, format, max_quality)
+    if len(data) <= max_bytes or max_quality <= min_quality:
+        return data, max_quality
+
+    # Size grows with quality, so binary search for the largest quality that fits
+    best = None
+    smallest = None
+    low, high = min_quality, max_quality - 1
+    while low <= high:
+        quality = (low + high) // 2
+        candidate = encode_image(img, format, quality)
+        if len(candidate) <= max_bytes:
+            best = (candidate, quality)
+            low = quality + 1
+        else:
+            if quality == min_quality:
+                smallest = (candidate, quality)
+            high = quality - 1
+
+    if best is None:
+        # Text legibility matters more than the budget; never go below min_quality
+        return smallest or (encode_image(img, format, min_quality), min_quality)
+    return best
+
+
+def encode_menu_image(
+    img,
+    encoder='adaptive',
+    format='jpeg',
+    max_bytes=350_000,
+    min_quality=45,
+    max_quality=75,
+    grayscale=False,
+):
+    """Encode a preprocessed menu image, returning (bytes, MIME type, encoding description)"""
+    if encoder == 'fixed':
+        return image_to_bytes(img), 'image/jpeg', 'jpeg:q75:optimized'
+
+    pil_format, mime_type = ENCODE_FORMATS[format]
+    data, quality = encode_for_budget(
+        img, max_bytes, pil_format, min_quality, max_quality, grayscale
+    )
+    encoding = f'{format}:q{quality}' + (':gray' if grayscale else '')
+    return data, mime_type, encoding
+
+
+def contrast_table(mean, contrast=CONTRAST_FACTOR):
+    """Build a per-level lookup table equivalent to ImageEnhance.Contrast, clamping included"""
+    table = []
+    for level in range(256):
+        value = mean + contrast * (level - mean)
+        # Image.blend truncates and clamps each result to 0-255
+        table.append(0 if value <= 0 else 255 if value >= 255 else int(value))
+    return table
+
+
+def sharpness_kernel(sharpness=SHARPNESS_FACTOR):
+    """Build one 3x3 kernel equivalent to ImageEnhance.Sharpness"""
+    # Sharpness is s*x - (s-1)*smooth(x), which is linear and folds into one convolution.
+    # The offset turns the filter's rounding into the truncation Image.blend applies
+    smooth_total = sum(SMOOTH_KERNEL)
+    weights = [
+        (sharpness if i == 4 else 0) - (sharpness - 1) * w / smooth_total
+        for i, w in enumerate(SMOOTH_KERNEL)
+    ]
+    return ImageFilter.Kernel((3, 3), weights, scale=1, offset=-0.5)
+
+
+def enhance_image(img, mean, contrast=CONTRAST_FACTOR, sharpness=SHARPNESS_FACTOR):
+    """Apply ImageEnhance.Contrast then Sharpness as a lookup table and a single convolution"""
+    # Contrast stays a separate, clamped step: folded into the kernel, levels it pushes
+    # past 0 or 255 would reach the sharpening unclipped and shift edges by several levels
+    table = contrast_table(mean, contrast) * len(img.getbands())
+    return img.point(table).filter(sharpness_kernel(sharpness))
+
+
+def preprocess_image_fast(image_file, max_size=1536, enhance=True, profile='balanced', max_pixels=None):
+    """Preprocess an image for Gemini while decoding and filtering as few pixels as possible"""
+    settings = PREPROCESS_PROFILES[profile]
+    img = open_image(image_file, max_pixels)
+
+    if img.format == 'JPEG' and max(img.size) > max_size:
+        # Let libjpeg downscale in the DCT domain (1/2, 1/4 or 1/8) while decoding
+        ratio = max_size / max(img.size)
+        img.draft('RGB', (int(img.width * ratio), int(img.height * ratio)))
+
+    try:
+        img = ImageOps.exif_transpose(img)
+    except Exception:
+        pass
+
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    if max(img.size) > max_size:
+        img.thumbnail(
+            (max_size, max_size),
+            settings['resample'],
+            reducing_gap=settings['reducing_gap'],
+        )
+
+    if enhance:
+        # Contrast pivots on the mean luminance, which a small preview estimates well
+        factor = max(1, min(img.size) // 64)
+        preview = img.reduce(factor).convert('L')
+        mean = ImageStat.Stat(preview).mean[0]
+        img = enhance_image(img, int(mean + 0.5))
+
+    return img
+
+
+def preprocess_menu_image(image_file, profile='balanced', max_size=1536, enhance=True, max_pixels=None):
+    """Preprocess an uploaded menu image with the configured quality/speed profile"""
+    if profile == 'quality':
+        return preprocess_image(image_file, max_size=max_size, enhance=enhance, max_pixels=max_pixels)
+    return preprocess_image_fast(
+        image_file, max_size=max_size, enhance=enhance, profile=profile, max_pixels=max_pixels
+    )
+
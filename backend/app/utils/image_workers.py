@@ -0,0 +1,270 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from flask import current_app
+from PIL import Image
+
+from app.utils.image_processing import encode_menu_image, preprocess_menu_image
+from app.utils.uploads import UploadSource, open_upload
+
+
+class ImageWorkersBusy(Exception):
+    """Raised when the image worker queue is full"""
+
+
+class ImageWorkerTimeout(Exception):
+    """Raised when an image task does not finish within the task timeout"""
+
+
+def warm_worker() -> None:
+    """Worker initializer: load every PIL format plugin before the first upload arrives"""
+    # Importing this module already registered the pillow_heif opener
+    Image.init()
+
+
+def gevent_patched() -> bool:
+    """True inside a gevent worker, where threading has been monkey-patched"""
+    if 'gevent.monkey' not in sys.modules:
+        return False
+    from gevent import monkey
+
+    return monkey.is_module_patched('threading')
+
+
+def process_image(
+    source: UploadSource,
+    profile: str,
+    encoder: Optional[Dict[str, Any]] = None,
+    max_pixels: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Decode, preprocess and encode an uploaded image, timing each step"""
+    # Image.open is lazy, so decoding is part of the preprocess step
+    start = time.perf_counter()
+    with open_upload(source) as image_file:
+        processed_image = preprocess_menu_image(image_file, profile=profile, max_pixels=max_pixels)
+        preprocessed = time.perf_counter()
+        try:
+            encoded_bytes, mime_type, encoding = encode_menu_image(processed_image, **(encoder or {}))
+            encoded = time.perf_counter()
+        finally:
+            processed_image.close()
+
+    return {
+        'image_bytes': encoded_bytes,
+        'mime_type': mime_type,
+        'encoding': encoding,
+        'timings': {
+            'preprocess': preprocessed - start,
+            'encode': encoded - preprocessed,
+        },
+    }
+
+
+def serve_image_tasks(tasks: Connection, results: Connection) -> None:
+    """Worker process loop for NativeHandoffPool: run each call received and send back its outcome"""
+    warm_worker()
+    while True:
+        try:
+            fn, args = tasks.recv()
+        except EOFError:
+            return
+        try:
+            results.send((True, fn(*args)))
+        except Exception as e:
+            results.send((False, e))
+
+
+class HandoffWorker(NamedTuple):
+    process: BaseProcess
+    tasks: Connection
+    results: Connection
+
+
+class NativeHandoffPool:
+    """Image worker processes for gevent workers, reached through gevent's native thread pool
+
+    ProcessPoolExecutor cannot run under gevent: its helper threads become greenlets,
+    and their blocking pipe I/O can stall the hub until a child finishes writing results
+    nobody is reading. Here a real OS thread carries each task to an idle worker process
+    over plain blocking pipes, so the hub only waits on the thread's future.
+    """
+
+    def __init__(self, max_workers: int):
+        from gevent.threadpool import ThreadPoolExecutor
+
+        self.max_workers = max_workers
+        # One thread per process, so a thread always finds an idle process
+        self._threads = ThreadPoolExecutor(max_workers=max_workers)
+        # forkserver talks to its server over sockets, which gevent has patched
+        self._context = multiprocessing.get_context('spawn')
+        self._workers: List[HandoffWorker] = []
+        self._idle: List[HandoffWorker] = []
+        self._start_workers()
+
+    def _start_workers(self) -> None:
+        # Processes are only started from greenlets; list appends and pops are atomic
+        while len(self._workers) < self.max_workers:
+            task_reader, task_writer = self._context.Pipe(duplex=False)
+            result_reader, result_writer = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=serve_image_tasks, args=(task_reader, result_writer), daemon=True
+            )
+            process.start()
+            task_reader.close()
+            result_writer.close()
+            worker = HandoffWorker(process, task_writer, result_reader)
+            self._workers.append(worker)
+            self._idle.append(worker)
+
+    def _run(self, fn: Callable, args: Tuple) -> Any:
+        # Runs on a native thread, where blocking pipe reads and writes do not touch the hub
+        try:
+            worker = self._idle.pop()
+        except IndexError:
+            raise RuntimeError('No image worker process is available')
+        try:
+            worker.tasks.send((fn, args))
+            ok, value = worker.results.recv()
+        except (EOFError, OSError):
+            self._workers.remove(worker)
+            worker.tasks.close()
+            worker.results.close()
+            raise RuntimeError('Image worker process exited')
+        self._idle.append(worker)
+        if not ok:
+            raise value
+        return value
+
+    def submit(self, fn: Callable, *args: Any):
+        # Replace any process that died since the last task
+        self._start_workers()
+        return self._threads.submit(self._run, fn, args)
+
+
+class ImageWorkerPool:
+    """Bounded process pool for CPU-bound image decoding and encoding"""
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending: int,
+        task_timeout: float,
+        profile: str,
+        encoder: Optional[Dict[str, Any]] = None,
+        max_pixels: Optional[int] = None,
+    ):
+        self.max_workers = max_workers
+        self.task_timeout = task_timeout
+        self.profile = profile
+        self.encoder = encoder
+        self.max_pixels = max_pixels
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _get_executor(self) -> Union[ProcessPoolExecutor, 'NativeHandoffPool']:
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                # Each gunicorn worker owns its own pool; never reuse one across a fork
+                if self._executor is None or self._executor_pid != pid:
+                    if gevent_patched():
+                        self._executor = NativeHandoffPool(self.max_workers)
+                        self._executor_pid = pid
+                        return self._executor
+                    start_methods = multiprocessing.get_all_start_methods()
+                    method = 'forkserver' if 'forkserver' in start_methods else 'spawn'
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context(method),
+                        initializer=warm_worker,
+                    )
+                    self._executor_pid = pid
+                    for _ in range(self.max_workers):
+                        self._executor.submit(warm_worker)
+        return self._executor
+
+    def warm(self) -> None:
+        """Start the worker processes ahead of the first request"""
+        if self.max_workers > 0:
+            self._get_executor()
+
+    def process(self, source: UploadSource) -> Dict[str, Any]:
+        """Preprocess and encode an upload, returning the payload and its encoding"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ImageWorkersBusy('Image workers are busy')
+
+        with self._lock:
+            self.submitted += 1
+
+        if self.max_workers <= 0:
+            try:
+                return process_image(source, self.profile, self.encoder, self.max_pixels)
+            finally:
+                self._slots.release()
+
+        try:
+            # Spooled uploads cross to the worker as a path, not as a pickled copy of their bytes
+            future = self._get_executor().submit(
+                process_image, source, self.profile, self.encoder, self.max_pixels
+            )
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the task really finishes, even after a timeout
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.task_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise ImageWorkerTimeout('Image processing timed out')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+            }
+
+
+def init_image_workers(app) -> None:
+    """Create the image worker pool for this app"""
+    app.extensions['image_workers'] = ImageWorkerPool(
+        max_workers=app.config['IMAGE_WORKERS'],
+        max_pending=app.config['IMAGE_WORKER_MAX_PENDING'],
+        task_timeout=app.config['IMAGE_WORKER_TIMEOUT'],
+        profile=app.config['IMAGE_PREPROCESS_PROFILE'],
+        encoder={
+            'encoder': app.config['IMAGE_ENCODER'],
+            'format': app.config['IMAGE_ENCODE_FORMAT'],
+            'max_bytes': app.config['IMAGE_ENCODE_MAX_BYTES'],
+            'min_quality': app.config['IMAGE_ENCODE_MIN_QUALITY'],
+            'max_quality': app.config['IMAGE_ENCODE_MAX_QUALITY'],
+            'grayscale': app.config['IMAGE_ENCODE_GRAYSCALE'],
+        },
+        max_pixels=app.config['IMAGE_MAX_PIXELS'],
+    )
+
+
+def get_image_workers() -> ImageWorkerPool:
+    return current_app.extensions['image_workers']
@@ -0,0 +1,105 @@
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import ItemAnalysis
+
+UNCACHEABLE_ALLERGENS = {'Unknown', '__ERROR__'}
+MAX_NAME_LENGTH = 255
+
+
+def normalize_item_name(item_name: str) -> str:
+    """Normalize a menu item name so trivially different spellings share a key"""
+    normalized = unicodedata.normalize('NFKC', item_name).casefold()
+    normalized = re.sub(r'[^\w\s]', ' ', normalized)
+    return ' '.join(normalized.split())
+
+
+def unknown_item(item_name: str) -> Dict[str, Any]:
+    """Placeholder result for an item the LLM did not classify"""
+    return {'item_name': item_name, 'common_allergens': ['Unknown'], 'confidence_score': 0}
+
+
+def is_cacheable(item: Dict[str, Any]) -> bool:
+    """Only confident classifications are worth reusing for other menus"""
+    allergens = item.get('common_allergens') or []
+    return (
+        bool(allergens)
+        and not UNCACHEABLE_ALLERGENS.intersection(allergens)
+        and isinstance(item.get('confidence_score'), int)
+        and item['confidence_score'] > 0
+    )
+
+
+def lookup_item_analyses(
+    normalized_names: Iterable[str], prompt_version: int
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch memoized classifications for the given normalized names in one query"""
+    names = {name for name in normalized_names if name}
+    if not names:
+        return {}
+
+    stmt = (
+        select(ItemAnalysis)
+        .where(ItemAnalysis.normalized_name.in_(names))
+        .where(ItemAnalysis.prompt_version == prompt_version)
+    )
+    return {
+        analysis.normalized_name: analysis.to_dict()
+        for analysis in db.session.scalars(stmt)
+    }
+
+
+def store_item_analyses(
+    items: Dict[str, Dict[str, Any]], prompt_version: int
+) -> None:
+    """Memoize fresh classifications keyed by normalized name"""
+    rows = [
+        ItemAnalysis(
+            normalized_name=name,
+            item_name=item['item_name'][:MAX_NAME_LENGTH],
+            common_allergens=item['common_allergens'],
+            confidence_score=item['confidence_score'],
+            prompt_version=prompt_version,
+        )
+        for name, item in items.items()
+        if name
+        and len(name) <= MAX_NAME_LENGTH
+        and is_cacheable(item)
+        # Memoized results are shared by every user; never store one under another item's key
+        and normalize_item_name(str(item.get('item_name', ''))) == name
+    ]
+    if not rows:
+        return
+
+    try:
+        db.session.add_all(rows)
+        db.session.commit()
+    except IntegrityError:
+        # Another request memoized some of these items first; theirs are as good as ours
+        db.session.rollback()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'Failed to memoize item analyses: {str(e)}')
+
+
+def match_fresh_items(
+    requested_items: List[str], parsed_data: List[Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Map LLM results back to the requested item names by normalized key"""
+    # Results usually arrive in request order, but the model may reorder or rename
+    # items, so a result is only ever attributed to the item it names
+    by_name = {}
+    for item in parsed_data:
+        by_name.setdefault(normalize_item_name(str(item.get('item_name', ''))), item)
+
+    matched = {}
+    for item in requested_items:
+        name = normalize_item_name(item)
+        matched[name] = by_name.get(name, unknown_item(item))
+    return matched
@@ -0,0 +1,88 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+from flask import current_app
+
+from app.extensions import db
+
+
+class JobQueueFull(Exception):
+    """Raised when the background job queue is full or shutting down"""
+
+
+class JobQueue:
+    """In-process background worker pool that runs jobs inside an app context"""
+
+    def __init__(self, app, max_workers: int, max_pending: int):
+        self.app = app
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='menu-job'
+        )
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_pending)
+        # Unfinished jobs and what to call if they never get to finish
+        self._unfinished: Dict[Future, Callable[[], None]] = {}
+        self._lock = threading.Lock()
+
+    def _run(self, fn: Callable, *args, **kwargs) -> None:
+        with self.app.app_context():
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                self.app.logger.exception(f'Background job {fn.__name__} failed')
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+    def _finished(self, future: Future) -> None:
+        with self._lock:
+            abandon = self._unfinished.pop(future, None)
+        self._slots.release()
+        if future.cancelled() and abandon:
+            self._run(abandon)
+
+    def submit(
+        self, fn: Callable, *args, on_abandon: Optional[Callable] = None, **kwargs
+    ) -> Future:
+        """Queue fn(*args, **kwargs) to run on a background worker
+
+        on_abandon(*args, **kwargs) is called instead if the job is dropped by shutdown.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull('Background job queue is full')
+        try:
+            future = self._executor.submit(self._run, fn, *args, **kwargs)
+        except RuntimeError:
+            self._slots.release()
+            raise JobQueueFull('Background job queue is shutting down')
+
+        with self._lock:
+            self._unfinished[future] = (lambda: on_abandon(*args, **kwargs)) if on_abandon else None
+        # Runs immediately if the job has already finished
+        future.add_done_callback(self._finished)
+        return future
+
+    def shutdown(self, timeout: float) -> None:
+        """Drop queued jobs, give running ones timeout seconds, then abandon the rest"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            running = list(self._unfinished)
+        _, not_done = wait(running, timeout=timeout)
+
+        with self._lock:
+            abandoned = [self._unfinished.get(future) for future in not_done]
+        for abandon in abandoned:
+            if abandon:
+                self._run(abandon)
+
+
+def init_job_queue(app) -> None:
+    """Create the background job pool for this app"""
+    app.extensions['job_queue'] = JobQueue(
+        app, app.config['MENU_JOB_WORKERS'], app.config['MENU_JOB_MAX_PENDING']
+    )
+
+
+def get_job_queue() -> JobQueue:
+    return current_app.extensions['job_queue']
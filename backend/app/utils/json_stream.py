@@ -0,0 +1,58 @@
+import json
+from typing import Any, List
+
+
+class JSONArrayStream:
+    """Incrementally extract complete elements from a JSON array streamed in chunks"""
+
+    WHITESPACE = ' \t\r\n'
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._decoder = json.JSONDecoder()
+
+    def _skip(self, chars: str) -> None:
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in chars:
+            self._pos += 1
+
+    def feed(self, text: str) -> List[Any]:
+        """Add a chunk of text and return any array elements it completed"""
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        elements = []
+
+        while not self._finished:
+            self._skip(self.WHITESPACE)
+            if self._pos >= len(self._buffer):
+                break
+
+            if not self._started:
+                if self._buffer[self._pos] != '[':
+                    raise ValueError('Streamed response is not a JSON array')
+                self._started = True
+                self._pos += 1
+                continue
+
+            self._skip(self.WHITESPACE + ',')
+            if self._pos >= len(self._buffer):
+                break
+            if self._buffer[self._pos] == ']':
+                self._finished = True
+                break
+
+            try:
+                element, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The element is still incomplete; wait for more text
+                break
+            elements.append(element)
+            self._pos = end
+
+        return elements
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
@@ -1,10 +1,13 @@
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from functools import wraps
-from typing import Any, Dict, Optional
+from typing import Any, Dict, NamedTuple, Optional
 
 import jwt
 from app.extensions import db
 from app.models import User
+from cachetools import TTLCache
 from flask import current_app, request
 
 
@@ -43,6 +46,127 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+class UserSnapshot(NamedTuple):
+    """Cached proof that a user exists, enough to serve requests that only need their id"""
+
+    # No profile fields: invalidation only reaches the worker process that handled a
+    # write, so anything cached here could be served stale by the others
+    id: int
+
+
+class AuthCache:
+    """Bounded TTL caches of verified access tokens and user snapshots"""
+
+    def __init__(self, max_entries: int, token_ttl: int, user_ttl: int):
+        self._claims = TTLCache(maxsize=max_entries, ttl=token_ttl)
+        self._users = TTLCache(maxsize=max_entries, ttl=user_ttl)
+        self._lock = threading.Lock()
+
+    def get_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._claims.get(token)
+        # Never serve a cached token past its own expiry
+        if payload and payload.get('exp', 0) > time.time():
+            return payload
+        return None
+
+    def set_claims(self, token: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._claims[token] = payload
+
+    def get_user(self, user_id: int) -> Optional[UserSnapshot]:
+        with self._lock:
+            return self._users.get(user_id)
+
+    def set_user(self, snapshot: UserSnapshot) -> None:
+        with self._lock:
+            self._users[snapshot.id] = snapshot
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+            stale_tokens = [
+                token
+                for token, payload in self._claims.items()
+                if payload.get('user_id') == user_id
+            ]
+            for token in stale_tokens:
+                self._claims.pop(token, None)
+
+
+def init_auth_cache(app) -> None:
+    """Create the token and user snapshot caches for this app"""
+    app.extensions['auth_cache'] = AuthCache(
+        max_entries=app.config['AUTH_CACHE_MAX_ENTRIES'],
+        token_ttl=app.config['AUTH_TOKEN_CACHE_TTL'],
+        user_ttl=app.config['AUTH_USER_CACHE_TTL'],
+    )
+
+
+def get_auth_cache() -> AuthCache:
+    return current_app.extensions['auth_cache']
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Drop this process's cached tokens and snapshot for a user after their account changes"""
+    get_auth_cache().invalidate_user(user_id)
+
+
+class CurrentUser:
+    """Authenticated user passed to views; the ORM User is only loaded when needed"""
+
+    def __init__(self, snapshot: UserSnapshot, user: Optional[User] = None):
+        object.__setattr__(self, 'id', snapshot.id)
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_user', user)
+
+    def _load(self) -> User:
+        if self._user is None:
+            object.__setattr__(self, '_user', db.session.get(User, self.id))
+        return self._user
+
+    def to_dict(self) -> dict:
+        return self._load().to_dict()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._load(), name, value)
+
+    def __repr__(self) -> str:
+        return f'<CurrentUser id={self.id}>'
+
+
+def verify_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """Decode an access token, reusing a cached verification when possible"""
+    auth_cache = get_auth_cache()
+    payload = auth_cache.get_claims(token)
+    if payload:
+        return payload
+
+    payload = decode_token(token)
+    if payload and payload.get('type') == 'access':
+        auth_cache.set_claims(token, payload)
+    return payload
+
+
+def load_current_user(user_id: int) -> Optional[CurrentUser]:
+    """Return the current user from the snapshot cache, loading it on a miss"""
+    auth_cache = get_auth_cache()
+    snapshot = auth_cache.get_user(user_id)
+    if snapshot:
+        return CurrentUser(snapshot)
+
+    user = db.session.get(User, user_id)
+    if not user:
+        return None
+
+    snapshot = UserSnapshot(id=user.id)
+    auth_cache.set_user(snapshot)
+    return CurrentUser(snapshot, user)
+
+
 def get_token_from_header() -> Optional[str]:
     """Extract token from Authorization header"""
     auth_header = request.headers.get('Authorization')
@@ -61,14 +185,14 @@ def token_required(f):
         if not token:
             return {'error': 'Token is missing'}, 401
 
-        payload = decode_token(token)
+        payload = verify_access_token(token)
         if not payload:
             return {'error': 'Token is invalid or expired'}, 401
 
         if payload.get('type') != 'access':
             return {'error': 'Invalid token type'}, 401
 
-        user = db.session.get(User, payload['user_id'])
+        user = load_current_user(payload['user_id'])
         if not user:
             return {'error': 'User not found'}, 401
 
@@ -86,9 +210,9 @@ def token_optional(f):
         current_user = None
 
         if token:
-            payload = decode_token(token)
+            payload = verify_access_token(token)
             if payload and payload.get('type') == 'access':
-                current_user = db.session.get(User, payload['user_id'])
+                current_user = load_current_user(payload['user_id'])
 
         return f(current_user=current_user, *args, **kwargs)
 
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Protocol, Tuple
+
+from flask import current_app
+from google.genai import errors, types
+
+from app.models import ALLERGEN_BITS
+from app.utils.genai_client import get_genai_client
+
+# Menu item names embedded in the text prompt by menu_analysis.items_contents
+TEXT_PROMPT_ITEMS = re.compile(r'menu items: (.*)\. For each item', re.DOTALL)
+
+# Ingredients the fake backend recognizes in item names, so results look plausible
+FAKE_ALLERGEN_KEYWORDS = {
+    'Milk': ('cheese', 'cream', 'butter', 'milk', 'parmesan', 'mozzarella', 'latte', 'tiramisu', 'alfredo'),
+    'Eggs': ('egg', 'mayo', 'aioli', 'caesar', 'custard', 'carbonara', 'benedict'),
+    'Fish': ('salmon', 'tuna', 'cod', 'anchov', 'fish', 'halibut', 'poke'),
+    'Shellfish': ('shrimp', 'prawn', 'lobster', 'crab', 'scallop', 'scampi', 'clam', 'mussel'),
+    'Tree Nuts': ('almond', 'walnut', 'pecan', 'cashew', 'pistachio', 'pesto'),
+    'Peanuts': ('peanut', 'satay', 'pad thai'),
+    'Wheat': ('bread', 'pasta', 'pizza', 'noodle', 'toast', 'bun', 'wrap', 'pie', 'cake', 'fries', 'pho'),
+    'Soybeans': ('soy', 'tofu', 'edamame', 'miso', 'teriyaki'),
+    'Sesame': ('sesame', 'tahini', 'hummus', 'falafel'),
+}
+FAKE_DISHES = (
+    'Caesar Salad', 'Pad Thai', 'Margherita Pizza', 'Chicken Tikka Masala', 'Beef Pho',
+    'Shrimp Scampi', 'Falafel Wrap', 'Mushroom Risotto', 'Fish Tacos', 'Tiramisu',
+    'Lobster Bisque', 'Garden Salad', 'Sesame Chicken', 'Tuna Poke Bowl', 'Pecan Pie',
+    'Grilled Steak', 'French Fries', 'Miso Soup', 'Fruit Plate', 'Eggs Benedict',
+)
+
+
+class LLMBackend(Protocol):
+    """What menu analysis needs from a model provider"""
+
+    def generate(self, model: str, contents: Any, config: Dict[str, Any]) -> Optional[str]:
+        """Return the complete response text"""
+
+    def generate_stream(self, model: str, contents: Any, config: Dict[str, Any]) -> Iterator[Optional[str]]:
+        """Yield the response text in chunks as it is produced"""
+
+
+class GeminiBackend:
+    """The Gemini API, through the shared genai.Client"""
+
+    def __init__(self, config):
+        # The client and its settings live in the genai_client registry
+        pass
+
+    def generate(self, model: str, contents: Any, config: Dict[str, Any]) -> Optional[str]:
+        response = get_genai_client().models.generate_content(
+            model=model, contents=contents, config=config
+        )
+        return response.text
+
+    def generate_stream(self, model: str, contents: Any, config: Dict[str, Any]) -> Iterator[Optional[str]]:
+        for chunk in get_genai_client().models.generate_content_stream(
+            model=model, contents=contents, config=config
+        ):
+            yield chunk.text
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Parse a latency distribution such as 'lognormal:0.8,0.5' into a sampler of seconds"""
+    kind, _, params = spec.partition(':')
+    try:
+        values = [float(value) for value in params.split(',')] if params else []
+    except ValueError:
+        raise ValueError(f'Invalid latency distribution: {spec}')
+
+    # kind: (number of parameters, sampler)
+    samplers = {
+        'constant': (1, lambda rng, s: s),
+        'uniform': (2, lambda rng, low, high: rng.uniform(low, high)),
+        'normal': (2, lambda rng, mean, stddev: rng.gauss(mean, stddev)),
+        'lognormal': (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma)),
+        'exponential': (1, lambda rng, mean: rng.expovariate(1 / mean) if mean > 0 else 0.0),
+    }
+    if kind not in samplers or len(values) != samplers[kind][0]:
+        raise ValueError(f'Invalid latency distribution: {spec}')
+
+    sampler = samplers[kind][1]
+    return lambda rng: max(sampler(rng, *values), 0.0)
+
+
+class FakeLLMBackend:
+    """Offline stand-in for Gemini with seeded latency, errors and schema-valid menu items"""
+
+    def __init__(self, config):
+        self.sample_latency = parse_latency(config['LLM_FAKE_LATENCY'])
+        self.latency_per_item = config['LLM_FAKE_LATENCY_PER_ITEM']
+        self.error_rate = config['LLM_FAKE_ERROR_RATE']
+        self.stream_chunks = max(config['LLM_FAKE_STREAM_CHUNKS'], 1)
+        self.seed = config['LLM_FAKE_SEED']
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.errors = 0
+
+    def _next_call(self) -> random.Random:
+        # Latency and errors follow the call sequence; items depend only on the
+        # request contents, so the same menu always gets the same answer
+        with self._lock:
+            self.calls += 1
+            sequence = self.calls
+        return random.Random(f'{self.seed}:{sequence}')
+
+    def _respond(self, contents: Any) -> Tuple[str, float, Optional[Exception]]:
+        """Draw this call's fate: (response text, latency in seconds, error or None)"""
+        rng = self._next_call()
+        items = self.menu_items(contents)
+        latency = self.sample_latency(rng) + self.latency_per_item * len(items)
+        error = None
+        if rng.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            error = errors.ServerError(
+                503,
+                {'error': {'code': 503, 'message': 'The model is overloaded (fake).', 'status': 'UNAVAILABLE'}},
+            )
+        return json.dumps(items), latency, error
+
+    def generate(self, model: str, contents: Any, config: Dict[str, Any]) -> Optional[str]:
+        text, latency, error = self._respond(contents)
+        time.sleep(latency)
+        if error is not None:
+            raise error
+        return text
+
+    def generate_stream(self, model: str, contents: Any, config: Dict[str, Any]) -> Iterator[Optional[str]]:
+        text, latency, error = self._respond(contents)
+        # Errors surface when the stream is opened, as with the real API
+        if error is not None:
+            time.sleep(latency / self.stream_chunks)
+            raise error
+        size = math.ceil(len(text) / self.stream_chunks)
+        for start in range(0, len(text), size):
+            time.sleep(latency / self.stream_chunks)
+            yield text[start:start + size]
+
+    def menu_items(self, contents: Any) -> List[Dict[str, Any]]:
+        """Build a schema-valid menu_item_schema array for a text or image request"""
+        if isinstance(contents, str):
+            match = TEXT_PROMPT_ITEMS.search(contents)
+            names = match.group(1).split(', ') if match else []
+            return [self.fake_item(name) for name in names]
+
+        # Image requests: invent a menu from the image bytes
+        digest = hashlib.sha256()
+        for part in contents:
+            if isinstance(part, types.Part) and part.inline_data is not None:
+                digest.update(part.inline_data.data)
+        rng = random.Random(digest.digest())
+        count = rng.randint(5, 25)
+        return [self.fake_item(f'{rng.choice(FAKE_DISHES)} {index + 1}') for index in range(count)]
+
+    def fake_item(self, name: str) -> Dict[str, Any]:
+        rng = random.Random(name)
+        key = name.casefold()
+        allergens = [
+            allergen
+            for allergen in ALLERGEN_BITS
+            if any(word in key for word in FAKE_ALLERGEN_KEYWORDS[allergen])
+        ]
+        if not allergens:
+            allergens = ['Unknown'] if rng.random() < 0.1 else ['None']
+        confidence = 0 if allergens == ['Unknown'] else rng.randint(5, 10)
+        return {'item_name': name, 'common_allergens': allergens, 'confidence_score': confidence}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'calls': self.calls, 'errors': self.errors}
+
+
+LLM_BACKENDS = {
+    'gemini': GeminiBackend,
+    'fake': FakeLLMBackend,
+}
+
+
+def init_llm_backend(app) -> None:
+    """Create the model provider configured for this app"""
+    backend_name = app.config['LLM_BACKEND']
+    if backend_name not in LLM_BACKENDS:
+        raise ValueError(f'Unknown LLM_BACKEND: {backend_name}')
+    app.extensions['llm_backend'] = LLM_BACKENDS[backend_name](app.config)
+
+
+def get_llm_backend() -> LLMBackend:
+    return current_app.extensions['llm_backend']
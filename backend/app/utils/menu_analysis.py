@@ -0,0 +1,379 @@
+import hashlib
+import json
+import time
+from typing import NamedTuple
+
+import httpx
+from flask import current_app
+from google.genai import errors, types
+from PIL import Image
+
+from app.models import (
+    STANDARD_ALLERGENS,
+    UPLOAD_STATUS_ANALYZING,
+    UPLOAD_STATUS_PREPROCESSING,
+)
+from app.utils.chunking import chunk_menu_items
+from app.utils.concurrency import map_in_app_context
+from app.utils.db_pool import release_connection
+from app.utils.image_processing import ImageTooLarge
+from app.utils.image_workers import (
+    ImageWorkersBusy,
+    ImageWorkerTimeout,
+    get_image_workers,
+)
+from app.utils.item_memo import (
+    lookup_item_analyses,
+    match_fresh_items,
+    normalize_item_name,
+    store_item_analyses,
+    unknown_item,
+)
+from app.utils.json_stream import JSONArrayStream
+from app.utils.llm_backend import get_llm_backend
+from app.utils.metrics import record_size, record_stage, stage_timer
+from app.utils.result_cache import get_result_cache
+from app.utils.uploads import upload_size
+
+
+class PreparedImage(NamedTuple):
+    """An encoded menu image ready to send to Gemini"""
+
+    data: bytes
+    mime_type: str
+    encoding: str
+    cache_key: str
+
+
+class MenuAnalysisError(Exception):
+    """Raised when a menu cannot be analyzed, with the HTTP status to report"""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+# Bump whenever the prompts or response schema change so cached results are not reused
+PROMPT_VERSION = 1
+
+# Gemini prompts
+gemini_image_prompt = (
+    'Extract all food items from this menu image. For each item, identify common allergens '
+    'from this set (spelled and capitalized as shown in the set): ' + str(STANDARD_ALLERGENS) + '. '
+    'Use "None" if no common allergens are present and "Unknown" if uncertain from the name alone. '
+    'It is better to be overcautious and list "Unknown" than to miss a potential allergen. '
+    'Be conservative with the confidence scores. '
+    'When using "Unknown" or "None", ensure it is the only allergen listed for that item. '
+    'Also for each item, include a confidence score from 1 to 10 (inclusive) on how confident you are in the listed allergens for that item. '
+    'If any item is labeled as "Unknown", the confidence score should be 0. '
+    'If the menu is unreadable (cannot accurately extract 90+% of the items), return a single object array with "__ERROR__" in all properties.'
+)
+gemini_text_prompt = (
+    'Here is a list of menu items: {menu_items}. For each item, identify common allergens '
+    'from this set (spelled and capitalized as shown in the set): {{' + ', '.join(STANDARD_ALLERGENS) + '}}. '
+    'Use "None" if no common allergens are present and "Unknown" if uncertain from the name alone. '
+    'Also for each item, include a confidence score from 1 to 10 (inclusive) on how confident you are in the listed allergens for that item. '
+    'If any item is labeled as unknown, the confidence score should be zero. '
+    'If more than 10% of the menu items are not food items, return a single object array with "__ERROR__" in all properties. Otherwise, '
+    'just set the common allergens to "Unknown" for the odd items.'
+)
+
+
+# Gemini structured output schemas
+menu_item_schema = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        'item_name': types.Schema(
+            type=types.Type.STRING,
+            description='Name of the menu item'
+        ),
+        'common_allergens': types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(type=types.Type.STRING),
+            description='List of common allergens found in this food item'
+        ),
+        'confidence_score': types.Schema(
+            type=types.Type.INTEGER,
+            description='Confidence in the listed allergens for this food item'
+        )
+    },
+    required=['item_name', 'common_allergens', 'confidence_score']
+)
+response_schema = types.Schema(type=types.Type.ARRAY, items=menu_item_schema)
+
+GENERATION_CONFIG = {
+    'response_mime_type': 'application/json',
+    'response_schema': response_schema,
+    'temperature': 0
+}
+
+
+# Raised by Gemini calls: API errors, and timeouts or network failures from the HTTP client
+GEMINI_ERRORS = (errors.APIError, httpx.TransportError)
+
+
+def model_error(error):
+    """Translate a Gemini API or transport error into a MenuAnalysisError"""
+    if isinstance(error, httpx.TimeoutException):
+        return MenuAnalysisError('Gemini request timed out', 504)
+    if isinstance(error, httpx.TransportError):
+        return MenuAnalysisError(f'Could not reach Gemini: {str(error)}', 503)
+    # Overload and quota errors are worth retrying; anything else is a bad gateway
+    status_code = 503 if error.code == 429 or error.code >= 500 else 502
+    return MenuAnalysisError(f'Gemini request failed: {error.message}', status_code)
+
+
+def generate_menu_analysis(contents):
+    """Send contents to Gemini and return the parsed structured menu items"""
+    # Do not pin a database connection for the length of the model call
+    release_connection()
+    with stage_timer('gemini'):
+        try:
+            response_text = get_llm_backend().generate(GEMINI_MODEL, contents, GENERATION_CONFIG)
+        except GEMINI_ERRORS as e:
+            raise model_error(e)
+
+    if not response_text:
+        raise MenuAnalysisError('No response from Gemini', 500)
+
+    with stage_timer('parse'):
+        return json.loads(response_text)
+
+
+def stream_menu_analysis(contents):
+    """Send contents to Gemini and yield each menu item as soon as it is complete"""
+    release_connection()
+    parser = JSONArrayStream()
+    received = False
+    start = time.perf_counter()
+    try:
+        for text in get_llm_backend().generate_stream(GEMINI_MODEL, contents, GENERATION_CONFIG):
+            if text:
+                if not received:
+                    record_stage('gemini-first-chunk', time.perf_counter() - start)
+                received = True
+                yield from parser.feed(text)
+    except GEMINI_ERRORS as e:
+        raise model_error(e)
+    record_stage('gemini-stream', time.perf_counter() - start)
+
+    if not received:
+        raise MenuAnalysisError('No response from Gemini', 500)
+    # A stream that stops mid-array (e.g. at the output token limit) is missing items
+    if not parser.finished:
+        raise MenuAnalysisError('Gemini response ended before the last menu item', 502)
+
+
+def is_error_result(parsed_data):
+    """Check for the sentinel Gemini returns when it cannot read the input"""
+    return bool(
+        parsed_data
+        and len(parsed_data) > 0
+        and parsed_data[0].get('item_name') == '__ERROR__'
+    )
+
+
+def prepare_menu_image(source):
+    """Preprocess and encode an uploaded image on the image workers, keyed for the result cache"""
+    record_size('input_image_bytes', upload_size(source), 'image-in-bytes')
+    start = time.perf_counter()
+    try:
+        processed = get_image_workers().process(source)
+    except (ImageTooLarge, Image.DecompressionBombError) as e:
+        raise MenuAnalysisError(str(e), 413)
+    except ImageWorkersBusy:
+        raise MenuAnalysisError('Image processing is busy, please try again shortly', 503)
+    except ImageWorkerTimeout:
+        raise MenuAnalysisError('Image processing timed out', 504)
+    except Exception as e:
+        raise MenuAnalysisError(f'Image processing failed: {str(e)}', 500)
+
+    elapsed = time.perf_counter() - start
+    worker_timings = processed['timings']
+    for stage, seconds in worker_timings.items():
+        record_stage(stage, seconds)
+    # Queueing for a free worker and shipping bytes to and from it
+    record_stage('image-queue', max(elapsed - sum(worker_timings.values()), 0.0))
+    record_size('output_jpeg_bytes', len(processed['image_bytes']), 'jpeg-bytes')
+
+    # The cache is shared by every user, so a hit must be the exact payload Gemini would be sent
+    payload_digest = hashlib.sha256(processed['image_bytes']).hexdigest()
+    return PreparedImage(
+        data=processed['image_bytes'],
+        mime_type=processed['mime_type'],
+        encoding=processed['encoding'],
+        cache_key=f'{GEMINI_MODEL}:v{PROMPT_VERSION}:{payload_digest}',
+    )
+
+
+def image_contents(image):
+    return [
+        gemini_image_prompt,
+        types.Part.from_bytes(
+            data=image.data,
+            mime_type=image.mime_type
+        )
+    ]
+
+
+def analyze_menu_image(source, on_stage=None):
+    """Extract a menu image's items and allergens, returning them with the image encoding used"""
+    if on_stage:
+        on_stage(UPLOAD_STATUS_PREPROCESSING)
+
+    image = prepare_menu_image(source)
+
+    result_cache = get_result_cache()
+    with stage_timer('cache-lookup'):
+        cached_result = result_cache.get(image.cache_key)
+    if cached_result is not None:
+        return cached_result, image.encoding
+
+    if on_stage:
+        on_stage(UPLOAD_STATUS_ANALYZING)
+
+    parsed_data = generate_menu_analysis(image_contents(image))
+    if is_error_result(parsed_data):
+        raise MenuAnalysisError('Menu image is too blurry or unreadable', 400)
+
+    result_cache.set(image.cache_key, parsed_data)
+    return parsed_data, image.encoding
+
+
+def stream_menu_image(image):
+    """Yield the items of a prepared menu image as Gemini produces them"""
+    result_cache = get_result_cache()
+    cached_result = result_cache.get(image.cache_key)
+    if cached_result is not None:
+        yield from cached_result
+        return
+
+    parsed_data = []
+    for item in stream_menu_analysis(image_contents(image)):
+        if not parsed_data and is_error_result([item]):
+            raise MenuAnalysisError('Menu image is too blurry or unreadable', 400)
+        parsed_data.append(item)
+        yield item
+
+    result_cache.set(image.cache_key, parsed_data)
+
+
+def split_known_items(menu_items):
+    """Return normalized names, memoized results and the unseen items to classify"""
+    normalized_names = [normalize_item_name(item) for item in menu_items]
+    known_items = lookup_item_analyses(normalized_names, PROMPT_VERSION)
+
+    # Only send each unseen item once, in first-seen order
+    unknown_items = {}
+    for item, name in zip(menu_items, normalized_names):
+        if name not in known_items and name not in unknown_items:
+            unknown_items[name] = item
+
+    return normalized_names, known_items, unknown_items
+
+
+def items_contents(menu_items):
+    return gemini_text_prompt.format(menu_items=', '.join(menu_items))
+
+
+def classify_chunk(chunk):
+    """Classify one chunk of unseen items, or return None if Gemini rejected the chunk"""
+    parsed_data = generate_menu_analysis(items_contents(chunk))
+    if is_error_result(parsed_data):
+        return None
+    return match_fresh_items(chunk, parsed_data)
+
+
+def analyze_menu_items(menu_items):
+    """Classify a list of menu item names, only asking Gemini about unseen items"""
+    normalized_names, known_items, unknown_items = split_known_items(menu_items)
+
+    if unknown_items:
+        chunks = chunk_menu_items(
+            list(unknown_items.values()), current_app.config['MENU_CHUNK_MAX_TOKENS']
+        )
+        if len(chunks) == 1:
+            outcomes = [(classify_chunk(chunks[0]), None)]
+        else:
+            outcomes = map_in_app_context(
+                classify_chunk, chunks, current_app.config['LLM_MAX_CONCURRENCY']
+            )
+
+        for _, error in outcomes:
+            if error is not None:
+                raise error
+        if all(fresh is None for fresh, _ in outcomes):
+            raise MenuAnalysisError('Invalid menu items', 400)
+
+        fresh_items = {}
+        for chunk, (chunk_items, _) in zip(chunks, outcomes):
+            # A rejected chunk only affects its own items
+            if chunk_items is None:
+                chunk_items = {normalize_item_name(item): unknown_item(item) for item in chunk}
+            fresh_items.update(chunk_items)
+
+        store_item_analyses(fresh_items, PROMPT_VERSION)
+        known_items.update(fresh_items)
+
+    return [known_items[name] for name in normalized_names]
+
+
+def stream_menu_items(menu_items):
+    """Yield classified menu items in request order as soon as each one is known"""
+    normalized_names, known_items, unknown_items = split_known_items(menu_items)
+    fresh_items = {}
+    next_index = 0
+
+    def ready_items():
+        nonlocal next_index
+        while (
+            next_index < len(normalized_names)
+            and normalized_names[next_index] in known_items
+        ):
+            yield known_items[normalized_names[next_index]]
+            next_index += 1
+
+    yield from ready_items()
+
+    chunks = []
+    if unknown_items:
+        chunks = chunk_menu_items(
+            list(unknown_items.values()), current_app.config['MENU_CHUNK_MAX_TOKENS']
+        )
+
+    # Chunks stream one after another so items keep arriving in request order
+    rejected_chunks = 0
+    for chunk in chunks:
+        pending_names = [normalize_item_name(item) for item in chunk]
+        first = True
+        for item in stream_menu_analysis(items_contents(chunk)):
+            if first and is_error_result([item]):
+                rejected_chunks += 1
+                if rejected_chunks == len(chunks):
+                    raise MenuAnalysisError('Invalid menu items', 400)
+                break
+            first = False
+            if not pending_names:
+                continue
+
+            # Only attribute a result to the item it names; unmatched items end up Unknown
+            name = normalize_item_name(str(item.get('item_name', '')))
+            if name not in pending_names:
+                continue
+            pending_names.remove(name)
+
+            fresh_items[name] = item
+            known_items[name] = item
+            yield from ready_items()
+
+        for name in pending_names:
+            known_items.setdefault(name, unknown_item(unknown_items[name]))
+        yield from ready_items()
+
+    if fresh_items:
+        store_item_analyses(fresh_items, PROMPT_VERSION)
+
+    yield from ready_items()
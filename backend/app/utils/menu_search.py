@@ -0,0 +1,231 @@
+import re
+from typing import List, Tuple
+
+from flask import current_app
+from sqlalchemy import select, text
+
+from app.extensions import db
+from app.models import UPLOAD_STATUS_COMPLETED, MenuItem, MenuUpload
+
+SEARCH_TERM = re.compile(r'\w+')
+
+# Relative weight of item name vs upload name matches when ranking
+ITEM_NAME_WEIGHT = 10.0
+UPLOAD_NAME_WEIGHT = 4.0
+
+SQLITE_SETUP = (
+    # owner holds a 'u<user_id>' token so the user filter is resolved by the
+    # full-text index itself instead of post-filtering every match
+    """
+    CREATE VIRTUAL TABLE menu_items_fts USING fts5(
+        owner, item_name, upload_name,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS menu_items_fts_insert AFTER INSERT ON menu_items BEGIN
+        INSERT INTO menu_items_fts (rowid, owner, item_name, upload_name)
+        VALUES (
+            new.id,
+            'u' || new.user_id,
+            new.item_name,
+            (SELECT upload_name FROM menu_uploads WHERE id = new.upload_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS menu_items_fts_delete AFTER DELETE ON menu_items BEGIN
+        DELETE FROM menu_items_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS menu_items_fts_rename AFTER UPDATE OF upload_name ON menu_uploads BEGIN
+        UPDATE menu_items_fts SET upload_name = new.upload_name
+        WHERE rowid IN (SELECT id FROM menu_items WHERE upload_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO menu_items_fts (rowid, owner, item_name, upload_name)
+    SELECT mi.id, 'u' || mi.user_id, mi.item_name, mu.upload_name
+    FROM menu_items mi JOIN menu_uploads mu ON mu.id = mi.upload_id
+    """,
+)
+
+POSTGRES_SETUP = (
+    # Serialize concurrent gunicorn workers running this at startup
+    'SELECT pg_advisory_xact_lock(726354)',
+    'ALTER TABLE menu_items ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    'CREATE INDEX IF NOT EXISTS ix_menu_items_search_vector ON menu_items USING GIN (search_vector)',
+    """
+    CREATE OR REPLACE FUNCTION menu_items_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.item_name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(
+                (SELECT upload_name FROM menu_uploads WHERE id = NEW.upload_id), ''
+            )), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS menu_items_search_vector_update ON menu_items',
+    """
+    CREATE TRIGGER menu_items_search_vector_update
+    BEFORE INSERT OR UPDATE OF item_name, upload_id ON menu_items
+    FOR EACH ROW EXECUTE FUNCTION menu_items_search_vector()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION menu_uploads_search_vector() RETURNS trigger AS $$
+    BEGIN
+        UPDATE menu_items SET item_name = item_name WHERE upload_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS menu_uploads_search_vector_rename ON menu_uploads',
+    """
+    CREATE TRIGGER menu_uploads_search_vector_rename
+    AFTER UPDATE OF upload_name ON menu_uploads
+    FOR EACH ROW EXECUTE FUNCTION menu_uploads_search_vector()
+    """,
+    # Backfill rows written before the index existed
+    'UPDATE menu_items SET item_name = item_name WHERE search_vector IS NULL',
+)
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a search query into word terms; punctuation is never passed to the index"""
+    return SEARCH_TERM.findall(query.lower())
+
+
+class SQLiteMenuSearch:
+    """FTS5 index with bm25 ranking, kept in sync by triggers"""
+
+    def setup(self) -> None:
+        exists = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'menu_items_fts'")
+        ).first()
+        if exists:
+            return
+        for statement in SQLITE_SETUP:
+            db.session.execute(text(statement))
+        db.session.commit()
+
+    def search(self, user_id: int, terms: List[str], limit: int) -> List[Tuple[int, float]]:
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        rows = db.session.execute(
+            text(
+                """
+                SELECT rowid, bm25(menu_items_fts, 0.0, :item_weight, :upload_weight) AS rank
+                FROM menu_items_fts
+                WHERE menu_items_fts MATCH :match
+                ORDER BY rank
+                LIMIT :limit
+                """
+            ),
+            {
+                # The terms must stay off the owner column, or 'u' would match every row
+                'match': f'owner : "u{user_id}" AND {{item_name upload_name}} : ({match})',
+                'item_weight': ITEM_NAME_WEIGHT,
+                'upload_weight': UPLOAD_NAME_WEIGHT,
+                'limit': limit,
+            },
+        )
+        # bm25 scores are negative with the best match lowest
+        return [(item_id, -rank) for item_id, rank in rows]
+
+
+class PostgresMenuSearch:
+    """tsvector column with a GIN index and ts_rank ranking, kept in sync by triggers"""
+
+    def setup(self) -> None:
+        for statement in POSTGRES_SETUP:
+            db.session.execute(text(statement))
+        db.session.commit()
+
+    def search(self, user_id: int, terms: List[str], limit: int) -> List[Tuple[int, float]]:
+        rows = db.session.execute(
+            text(
+                """
+                SELECT id, ts_rank(search_vector, query) AS rank
+                FROM menu_items, to_tsquery('simple', :query) AS query
+                WHERE user_id = :user_id AND search_vector @@ query
+                ORDER BY rank DESC
+                LIMIT :limit
+                """
+            ),
+            {
+                'query': ' & '.join(f'{term}:*' for term in terms),
+                'user_id': user_id,
+                'limit': limit,
+            },
+        )
+        return [(item_id, float(rank)) for item_id, rank in rows]
+
+
+class LikeMenuSearch:
+    """Unindexed substring search for databases without a supported full-text engine"""
+
+    def setup(self) -> None:
+        pass
+
+    def search(self, user_id: int, terms: List[str], limit: int) -> List[Tuple[int, float]]:
+        stmt = (
+            select(MenuItem.id)
+            .join(MenuItem.upload)
+            .where(MenuItem.user_id == user_id)
+            .order_by(MenuItem.id.desc())
+            .limit(limit)
+        )
+        for term in terms:
+            pattern = f'%{term}%'
+            stmt = stmt.where(
+                MenuItem.item_name.ilike(pattern) | MenuUpload.upload_name.ilike(pattern)
+            )
+        return [(item_id, 0.0) for item_id in db.session.scalars(stmt)]
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteMenuSearch,
+    'postgresql': PostgresMenuSearch,
+}
+
+
+def init_menu_search(app) -> None:
+    """Create the full-text index for this app's database; call after create_all"""
+    with app.app_context():
+        backend = SEARCH_BACKENDS.get(db.engine.dialect.name, LikeMenuSearch)()
+        try:
+            backend.setup()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f'Menu search index setup failed, using LIKE search: {str(e)}')
+            backend = LikeMenuSearch()
+    app.extensions['menu_search'] = backend
+
+
+def get_menu_search():
+    return current_app.extensions['menu_search']
+
+
+def search_menu_items(user_id: int, query: str, limit: int) -> List[Tuple[MenuItem, MenuUpload, float]]:
+    """Return the user's completed menu items matching every term of query, best first"""
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    ranked = get_menu_search().search(user_id, terms, limit)
+    if not ranked:
+        return []
+
+    stmt = (
+        select(MenuItem, MenuUpload)
+        .join(MenuItem.upload)
+        .where(
+            MenuItem.id.in_([item_id for item_id, _ in ranked]),
+            MenuUpload.status == UPLOAD_STATUS_COMPLETED,
+        )
+    )
+    rows = {menu_item.id: (menu_item, upload) for menu_item, upload in db.session.execute(stmt)}
+    return [rows[item_id] + (rank,) for item_id, rank in ranked if item_id in rows]
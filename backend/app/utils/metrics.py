@@ -0,0 +1,211 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import current_app, g, has_app_context, request
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216, 67_108_864)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500)
+
+
+def escape_label_value(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    pairs = (f'{name}="{escape_label_value(value)}"' for name, value in labels.items())
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus text exposition format"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        buckets: Sequence[float],
+        label_names: Sequence[str] = (),
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            # Per series: one counter per bucket, then sum and count
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            labels = dict(zip(self.label_names, key))
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{format_labels({**labels, "le": format_value(bound)})} {count}')
+            lines.append(f'{self.name}_bucket{format_labels({**labels, "le": "+Inf"})} {series[-1]}')
+            lines.append(f'{self.name}_sum{format_labels(labels)} {format_value(series[-2])}')
+            lines.append(f'{self.name}_count{format_labels(labels)} {series[-1]}')
+        return lines
+
+
+class RequestTimings:
+    """Stage durations collected while serving one request, for the Server-Timing header"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, List[float]] = {}
+        self.values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def add_value(self, name: str, value: float) -> None:
+        with self._lock:
+            self.values[name] = value
+
+    def header(self) -> str:
+        entries = [f'total;dur={(time.perf_counter() - self.start) * 1000:.1f}']
+        with self._lock:
+            for stage, (seconds, count) in self.stages.items():
+                entry = f'{stage};dur={seconds * 1000:.1f}'
+                if count > 1:
+                    entry += f';desc="{count} calls"'
+                entries.append(entry)
+            for name, value in self.values.items():
+                entries.append(f'{name};desc="{value:g}"')
+        return ', '.join(entries)
+
+
+class Metrics:
+    """Process-local request and menu pipeline histograms"""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            'http_request_duration_seconds',
+            'HTTP request latency by route',
+            DURATION_BUCKETS,
+            ('method', 'endpoint', 'status'),
+        )
+        self.stage_duration = Histogram(
+            'menu_stage_duration_seconds',
+            'Time spent in each menu analysis stage',
+            DURATION_BUCKETS,
+            ('stage',),
+        )
+        self.input_image_bytes = Histogram(
+            'menu_input_image_bytes', 'Size of uploaded menu images', BYTES_BUCKETS
+        )
+        self.output_jpeg_bytes = Histogram(
+            'menu_output_jpeg_bytes', 'Size of encoded images sent to Gemini', BYTES_BUCKETS
+        )
+        self.item_count = Histogram(
+            'menu_item_count', 'Menu items returned per analysis', COUNT_BUCKETS
+        )
+
+    def render(self) -> str:
+        lines = []
+        for histogram in (
+            self.request_duration,
+            self.stage_duration,
+            self.input_image_bytes,
+            self.output_jpeg_bytes,
+            self.item_count,
+        ):
+            lines.extend(histogram.render())
+        return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app) -> None:
+    """Create the metrics registry and time every request"""
+    app.extensions['metrics'] = Metrics()
+
+    @app.before_request
+    def start_request_timings():
+        g.request_timings = RequestTimings()
+
+    @app.after_request
+    def record_request_timings(response):
+        timings = g.pop('request_timings', None)
+        if timings is None:
+            return response
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        get_metrics().request_duration.observe(
+            time.perf_counter() - timings.start,
+            method=request.method,
+            endpoint=endpoint,
+            status=str(response.status_code),
+        )
+        response.headers['Server-Timing'] = timings.header()
+        return response
+
+
+def get_metrics() -> Metrics:
+    return current_app.extensions['metrics']
+
+
+def request_timings() -> Optional[RequestTimings]:
+    """The current request's timings, if any; pass to use_request_timings in worker threads"""
+    if not has_app_context():
+        return None
+    return g.get('request_timings')
+
+
+def use_request_timings(timings: Optional[RequestTimings]) -> None:
+    """Attribute stages recorded in this app context to another thread's request"""
+    if timings is not None:
+        g.request_timings = timings
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration in the histograms and the current request's timings"""
+    if not has_app_context():
+        return
+    get_metrics().stage_duration.observe(seconds, stage=stage)
+    timings = g.get('request_timings')
+    if timings is not None:
+        timings.add_stage(stage, seconds)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time the enclosed block as a menu analysis stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def record_size(metric: str, value: float, timing_name: Optional[str] = None) -> None:
+    """Observe one of the size histograms and optionally report the value in Server-Timing"""
+    if not has_app_context():
+        return
+    getattr(get_metrics(), metric).observe(value)
+    timings = g.get('request_timings')
+    if timings is not None and timing_name:
+        timings.add_value(timing_name, value)
@@ -0,0 +1,175 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from cachetools import TTLCache
+from flask import current_app
+from sqlalchemy import delete, func, select
+
+from app.extensions import db
+from app.models import AnalysisCacheEntry
+
+
+class MemoryCacheBackend:
+    """In-process cache backend with TTL and LRU eviction"""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self._cache = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key: str, value: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+
+class SQLCacheBackend:
+    """Database-backed cache shared by all workers, with TTL and LRU eviction"""
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        # Expired rows are treated as misses here and purged on the next store
+        stmt = (
+            select(AnalysisCacheEntry)
+            .where(AnalysisCacheEntry.cache_key == key)
+            .where(AnalysisCacheEntry.created_at >= self._cutoff())
+        )
+        entry = db.session.execute(stmt).scalar_one_or_none()
+        if not entry:
+            return None
+
+        entry.last_accessed_at = datetime.now(timezone.utc)
+        db.session.commit()
+        return entry.analysis_result
+
+    def set(self, key: str, value: List[Dict[str, Any]]) -> None:
+        stmt = select(AnalysisCacheEntry).where(AnalysisCacheEntry.cache_key == key)
+        entry = db.session.execute(stmt).scalar_one_or_none()
+        now = datetime.now(timezone.utc)
+        if entry:
+            entry.analysis_result = value
+            entry.created_at = now
+            entry.last_accessed_at = now
+        else:
+            db.session.add(AnalysisCacheEntry(cache_key=key, analysis_result=value))
+        db.session.flush()
+
+        db.session.execute(
+            delete(AnalysisCacheEntry).where(
+                AnalysisCacheEntry.created_at < self._cutoff()
+            )
+        )
+        overflow = self.size() - self.max_entries
+        if overflow > 0:
+            oldest = (
+                select(AnalysisCacheEntry.id)
+                .order_by(AnalysisCacheEntry.last_accessed_at.asc())
+                .limit(overflow)
+            )
+            db.session.execute(
+                delete(AnalysisCacheEntry).where(AnalysisCacheEntry.id.in_(oldest))
+            )
+        db.session.commit()
+
+    def clear(self) -> None:
+        db.session.execute(delete(AnalysisCacheEntry))
+        db.session.commit()
+
+    def size(self) -> int:
+        return db.session.scalar(select(func.count(AnalysisCacheEntry.id))) or 0
+
+
+CACHE_BACKENDS = {
+    'memory': MemoryCacheBackend,
+    'sql': SQLCacheBackend,
+}
+
+
+class ResultCache:
+    """Cache of menu analysis results with hit/miss counters"""
+
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached analysis result for key, or None on a miss"""
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f'Result cache lookup failed: {str(e)}')
+            self._count('errors')
+            return None
+
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key: str, value: List[Dict[str, Any]]) -> None:
+        """Store an analysis result; failures are logged and otherwise ignored"""
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(key, value)
+            self._count('stores')
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.warning(f'Result cache store failed: {str(e)}')
+            self._count('errors')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'backend': type(self.backend).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'errors': self.errors,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def init_result_cache(app) -> None:
+    """Create the analysis result cache configured for this app"""
+    backend_name = app.config['RESULT_CACHE_BACKEND']
+    enabled = backend_name != 'none'
+    backend_class = CACHE_BACKENDS.get(backend_name, MemoryCacheBackend)
+    backend = backend_class(
+        max_entries=app.config['RESULT_CACHE_MAX_ENTRIES'],
+        ttl=app.config['RESULT_CACHE_TTL'],
+    )
+    app.extensions['result_cache'] = ResultCache(backend, enabled=enabled)
+
+
+def get_result_cache() -> ResultCache:
+    return current_app.extensions['result_cache']
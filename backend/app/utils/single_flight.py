@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+from flask import current_app
+
+
+class SingleFlight:
+    """Runs concurrent calls that share a key once, handing every caller the same outcome"""
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (fn's result, whether it came from a call already in flight)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                self.executed += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            # Re-raises the leader's exception, so waiters fail the same way
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+            }
+
+
+def init_single_flight(app) -> None:
+    """Create the in-flight request coalescer for this app"""
+    app.extensions['single_flight'] = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return current_app.extensions['single_flight']
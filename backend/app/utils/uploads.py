@@ -0,0 +1,106 @@
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional, Union
+
+from flask import Request, current_app, jsonify
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# What the image workers are given for an upload: its bytes, or the path of its spooled file
+UploadSource = Union[bytes, str]
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class SpoolingRequest(Request):
+    """Request that writes file parts of large bodies to named temporary files"""
+
+    def _get_file_stream(
+        self,
+        total_content_length: Optional[int],
+        content_type: Optional[str],
+        filename: Optional[str] = None,
+        content_length: Optional[int] = None,
+    ) -> IO[bytes]:
+        config = current_app.config
+        if total_content_length is not None and total_content_length <= config['UPLOAD_SPOOL_MAX_MEMORY']:
+            return io.BytesIO()
+        # Unlike Werkzeug's default spool, the file has a path that image workers can map.
+        # It is removed when the request closes its files
+        return tempfile.NamedTemporaryFile('wb+', dir=config['UPLOAD_SPOOL_DIR'], prefix='upload-')
+
+
+def upload_too_large(e):
+    limit = current_app.config['MAX_CONTENT_LENGTH']
+    return jsonify({'error': f'Upload too large; the limit is {limit // (1024 * 1024)} MB'}), 413
+
+
+def init_uploads(app) -> None:
+    """Spool large uploads to disk and answer bodies over MAX_CONTENT_LENGTH with a JSON 413"""
+    if app.config['UPLOAD_SPOOL_DIR']:
+        os.makedirs(app.config['UPLOAD_SPOOL_DIR'], exist_ok=True)
+    app.request_class = SpoolingRequest
+    app.register_error_handler(RequestEntityTooLarge, upload_too_large)
+
+
+def upload_source(file_storage: FileStorage) -> UploadSource:
+    """Return the path of a spooled upload, or the bytes of one that was kept in memory"""
+    stream = file_storage.stream
+    path = getattr(stream, 'name', None)
+    if isinstance(path, str) and os.path.isfile(path):
+        stream.flush()
+        return path
+    stream.seek(0)
+    return stream.read()
+
+
+def keep_upload(file_storage: FileStorage) -> UploadSource:
+    """Like upload_source, but spooled files are copied so they outlive the request"""
+    source = upload_source(file_storage)
+    if isinstance(source, bytes):
+        return source
+    with open(source, 'rb') as src, tempfile.NamedTemporaryFile(
+        'wb', dir=current_app.config['UPLOAD_SPOOL_DIR'], prefix='job-', delete=False
+    ) as dst:
+        shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+    return dst.name
+
+
+def discard_upload(source: UploadSource) -> None:
+    """Remove a file made by keep_upload"""
+    if isinstance(source, str):
+        try:
+            os.unlink(source)
+        except FileNotFoundError:
+            pass
+
+
+def upload_sha256(file_storage: FileStorage, prefix: bytes = b'') -> str:
+    """Hash prefix followed by an upload's contents, reading it in chunks"""
+    digest = hashlib.sha256(prefix)
+    stream = file_storage.stream
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def upload_size(source: UploadSource) -> int:
+    return len(source) if isinstance(source, bytes) else os.path.getsize(source)
+
+
+@contextmanager
+def open_upload(source: UploadSource) -> Iterator[IO[bytes]]:
+    """Yield a file object over an upload; spooled files are memory-mapped read-only"""
+    if isinstance(source, bytes):
+        yield io.BytesIO(source)
+        return
+    with open(source, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        # Pages are read from the page cache on demand instead of copied onto the heap
+        yield mapped
@@ -0,0 +1,28 @@
+from app import create_app
+from app.extensions import db
+from app.models import MenuItem, MenuUpload
+from sqlalchemy import exists, select
+
+BATCH_SIZE = 200
+
+app = create_app()
+with app.app_context():
+    # Uploads saved before menu_items existed have an analysis_result but no rows
+    missing_items = (
+        select(MenuUpload)
+        .where(~exists().where(MenuItem.upload_id == MenuUpload.id))
+        .order_by(MenuUpload.id)
+        .limit(BATCH_SIZE)
+    )
+    backfilled = 0
+    last_id = 0
+    while True:
+        uploads = db.session.scalars(missing_items.where(MenuUpload.id > last_id)).all()
+        if not uploads:
+            break
+        for upload in uploads:
+            upload.set_analysis_result(upload.analysis_result or [])
+            last_id = upload.id
+        db.session.commit()
+        backfilled += len(uploads)
+    print(f'Menu items backfilled for {backfilled} uploads.')
@@ -0,0 +1,147 @@
+"""Count the SQL statements and time spent listing a user's allergies per loading strategy.
+
+Usage:
+    python benchmarks/bench_allergy_queries.py [--allergies 9,50,200] [--repeat 200]
+
+Builds the app with TestingConfig (in-memory SQLite), gives one user each
+requested number of allergies (adding synthetic allergens beyond the standard
+nine) and lists them through:
+
+    lazy        ORM objects, reading user_allergy.allergen one row at a time (N+1)
+    selectin    ORM objects with selectinload(UserAllergy.allergen)
+    joined      ORM objects with joinedload(UserAllergy.allergen)
+    projection  list_user_allergies: column rows plus the allergen registry
+    endpoint    GET /api/allergy/get end to end through the test client, once the
+                user is in the auth cache
+
+Statements are counted with a before_cursor_execute listener on the engine.
+The session is cleared between calls so that nothing is served from the
+identity map.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def orm_strategy(option):
+    """List allergies as ORM objects, reading names through the allergen relationship"""
+    from sqlalchemy import select
+
+    from app.extensions import db
+    from app.models import UserAllergy
+
+    def run(user_id):
+        stmt = (
+            select(UserAllergy)
+            .options(option(UserAllergy.allergen))
+            .where(UserAllergy.user_id == user_id)
+            .order_by(UserAllergy.severity.desc())
+        )
+        return [
+            {
+                'id': user_allergy.id,
+                'user_id': user_allergy.user_id,
+                'allergen_id': user_allergy.allergen_id,
+                'severity': user_allergy.severity,
+                'allergen_name': user_allergy.allergen.name,
+            }
+            for user_allergy in db.session.scalars(stmt).unique()
+        ]
+
+    return run
+
+
+def create_user(app, count):
+    """Create a user with count allergies and return (user id, auth headers)"""
+    from sqlalchemy import func, select
+
+    from app.extensions import db
+    from app.models import Allergen, User, UserAllergy
+    from app.utils.allergen_registry import get_allergen_registry
+    from app.utils.jwt_utils import generate_access_token
+
+    with app.app_context():
+        existing = db.session.scalar(select(func.count(Allergen.id)))
+        db.session.add_all(
+            [Allergen(name=f'Synthetic {index}') for index in range(existing, count)]
+        )
+        user = User(email=f'bench-{count}@bench.invalid')
+        db.session.add(user)
+        db.session.flush()
+        allergen_ids = db.session.scalars(select(Allergen.id).order_by(Allergen.id).limit(count))
+        db.session.add_all(
+            [
+                UserAllergy(user_id=user.id, allergen_id=allergen_id, severity=index % 3 + 1)
+                for index, allergen_id in enumerate(allergen_ids)
+            ]
+        )
+        db.session.commit()
+        get_allergen_registry().refresh()
+        return user.id, {'Authorization': f'Bearer {generate_access_token(user.id)}'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--allergies', default='9,50,200', help='Comma-separated allergy counts per user')
+    parser.add_argument('--repeat', type=int, default=200, help='Calls per strategy, for timing')
+    args = parser.parse_args()
+
+    from sqlalchemy import event
+    from sqlalchemy.orm import joinedload, lazyload, selectinload
+
+    from app import create_app
+    from app.extensions import db
+    from app.routes.allergy_routes import list_user_allergies
+
+    app = create_app('testing')
+    client = app.test_client()
+    statements = []
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    strategies = {
+        'lazy': orm_strategy(lazyload),
+        'selectin': orm_strategy(selectinload),
+        'joined': orm_strategy(joinedload),
+        'projection': list_user_allergies,
+    }
+
+    print(f'{"allergies":>9} {"strategy":<11} {"queries":>8} {"ms/call":>8}')
+    for count in (int(value) for value in args.allergies.split(',')):
+        user_id, headers = create_user(app, count)
+
+        for name, run in strategies.items():
+            with app.app_context():
+                statements.clear()
+                result = run(user_id)
+                queries = len(statements)
+                assert len(result) == count, f'{name} returned {len(result)} allergies'
+                db.session.expunge_all()
+
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    run(user_id)
+                    db.session.expunge_all()
+                seconds = (time.perf_counter() - start) / args.repeat
+            print(f'{count:>9} {name:<11} {queries:>8} {seconds * 1000:>8.2f}')
+
+        # The first request also loads the user into the auth cache
+        client.get('/api/allergy/get', headers=headers)
+        statements.clear()
+        response = client.get('/api/allergy/get', headers=headers)
+        queries = len(statements)
+        assert len(response.get_json()['user_allergy']) == count
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            client.get('/api/allergy/get', headers=headers)
+        seconds = (time.perf_counter() - start) / args.repeat
+        print(f'{count:>9} {"endpoint":<11} {queries:>8} {seconds * 1000:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Measure manual menu classification latency against the chunk token budget.
+
+Usage:
+    python benchmarks/bench_chunking.py [--items 500] [--budgets 1000 2000 4000 64000]
+
+Calls Gemini for real, so GEMINI_API_KEY must be set. Every budget runs
+against a fresh in-memory database so the per-item memo starts empty.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+DISHES = [
+    'Caesar Salad', 'Pad Thai', 'Margherita Pizza', 'Chicken Tikka Masala',
+    'Beef Pho', 'Shrimp Scampi', 'Falafel Wrap', 'Mushroom Risotto',
+    'Fish Tacos', 'Tiramisu', 'Peanut Noodles', 'Lobster Bisque',
+    'Eggplant Parmesan', 'Sesame Chicken', 'Tuna Poke Bowl', 'Pecan Pie',
+]
+STYLES = [
+    'Classic', 'Spicy', 'Grilled', 'Vegan', 'Crispy', 'House', 'Smoked',
+    'Garlic', 'Lemon', 'Truffle', 'Chef\'s', 'Family Style', 'Mini', 'Baked',
+]
+SERVINGS = ['', ' Combo', ' Platter', ' with Fries']
+
+
+def menu_items(count):
+    """Generate count distinct, realistic menu item names"""
+    names = (
+        f'{style} {dish}{serving}'
+        for serving, style, dish in itertools.product(SERVINGS, STYLES, DISHES)
+    )
+    return list(itertools.islice(names, count))
+
+
+def run(budget, items):
+    from app import create_app
+    from app.utils.chunking import chunk_menu_items
+    from app.utils.menu_analysis import analyze_menu_items
+
+    app = create_app('testing')
+    app.config['MENU_CHUNK_MAX_TOKENS'] = budget
+    with app.app_context():
+        chunks = len(chunk_menu_items(items, budget))
+        start = time.perf_counter()
+        results = analyze_menu_items(items)
+        elapsed = time.perf_counter() - start
+
+    unknown = sum(1 for item in results if 'Unknown' in item['common_allergens'])
+    return chunks, elapsed, len(results), unknown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=500, help='Number of menu items')
+    parser.add_argument(
+        '--budgets', type=int, nargs='+', default=[1000, 2000, 4000, 8000, 64000],
+        help='MENU_CHUNK_MAX_TOKENS values to compare',
+    )
+    args = parser.parse_args()
+
+    if not os.environ.get('GEMINI_API_KEY'):
+        sys.exit('GEMINI_API_KEY must be set')
+
+    items = menu_items(args.items)
+    print(f'{"budget":>8} {"chunks":>7} {"seconds":>8} {"items":>6} {"unknown":>8}')
+    for budget in args.budgets:
+        chunks, elapsed, returned, unknown = run(budget, items)
+        print(f'{budget:>8} {chunks:>7} {elapsed:>8.2f} {returned:>6} {unknown:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Compare payload size, encode time and extraction accuracy of the menu image encoders.
+
+Usage:
+    python benchmarks/bench_image_encoding.py [corpus_dir] [--max-bytes 350000] [--accuracy]
+
+corpus_dir should contain sample menu photos; when it is omitted the synthetic
+corpus of bench_preprocess.py is generated. Every image is preprocessed once
+with the balanced profile and then encoded by each encoder. Legibility is
+estimated locally as the PSNR of the decoded grayscale image against the
+unencoded one. With --accuracy every encoding is also sent to Gemini (so
+GEMINI_API_KEY must be set) and its extracted items are compared with those of
+the fixed quality 75 JPEG encoder that was used before.
+"""
+
+import argparse
+import io
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_preprocess import IMAGE_EXTENSIONS, generate_corpus  # noqa: E402
+
+ENCODERS = {
+    'fixed': {'encoder': 'fixed'},
+    'jpeg': {'format': 'jpeg'},
+    'jpeg-gray': {'format': 'jpeg', 'grayscale': True},
+    'webp': {'format': 'webp'},
+    'webp-gray': {'format': 'webp', 'grayscale': True},
+}
+
+
+def psnr(reference, data):
+    """Peak signal-to-noise ratio of an encoded image against its grayscale source"""
+    from PIL import Image, ImageChops
+
+    with Image.open(io.BytesIO(data)) as decoded:
+        diff = ImageChops.difference(reference, decoded.convert('L'))
+    histogram = diff.histogram()
+    mse = sum(count * value * value for value, count in enumerate(histogram)) / sum(histogram)
+    return float('inf') if mse == 0 else 10 * math.log10(255 * 255 / mse)
+
+
+def extract(app, data, mime_type):
+    """Run Gemini extraction on one encoding, returning {normalized name: allergen set}"""
+    from app.utils.item_memo import normalize_item_name
+    from app.utils.menu_analysis import (
+        PreparedImage,
+        generate_menu_analysis,
+        image_contents,
+    )
+
+    image = PreparedImage(data=data, mime_type=mime_type, encoding='', cache_key='')
+    with app.app_context():
+        items = generate_menu_analysis(image_contents(image))
+    return {
+        normalize_item_name(item['item_name']): frozenset(item['common_allergens'])
+        for item in items
+    }
+
+
+def agreement(baseline, items):
+    """Share of baseline items found again, and share of those with the same allergens"""
+    if not baseline:
+        return 1.0, 1.0
+    found = [name for name in baseline if name in items]
+    same = sum(1 for name in found if items[name] == baseline[name])
+    return len(found) / len(baseline), same / len(found) if found else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('corpus_dir', nargs='?', help='Directory of sample menu images')
+    parser.add_argument('--max-bytes', type=int, default=350_000, help='Adaptive encoder byte budget')
+    parser.add_argument('--min-quality', type=int, default=45)
+    parser.add_argument('--max-quality', type=int, default=75)
+    parser.add_argument('--repeat', type=int, default=3, help='Encodes per image, for timing')
+    parser.add_argument('--accuracy', action='store_true', help='Also compare Gemini extractions')
+    args = parser.parse_args()
+
+    if args.accuracy and not os.environ.get('GEMINI_API_KEY'):
+        sys.exit('GEMINI_API_KEY must be set for --accuracy')
+
+    from app.utils.image_processing import encode_menu_image, preprocess_menu_image
+
+    app = None
+    if args.accuracy:
+        from app import create_app
+
+        app = create_app('testing')
+
+    budget = {
+        'max_bytes': args.max_bytes,
+        'min_quality': args.min_quality,
+        'max_quality': args.max_quality,
+    }
+    report = {name: {'bytes': 0, 'seconds': 0.0, 'psnr': [], 'recall': [], 'allergens': []} for name in ENCODERS}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus_dir
+        if not corpus_dir:
+            print('No corpus given, generating synthetic menus...')
+            generate_corpus(tmp)
+            corpus_dir = tmp
+
+        paths = sorted(
+            p for p in Path(corpus_dir).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS
+        )
+        if not paths:
+            sys.exit(f'No images found in {corpus_dir}')
+
+        print(f'\n{"image":<24} {"encoder":<10} {"encoding":<16} {"KiB":>7} {"ms":>7} {"PSNR":>6}')
+        for path in paths:
+            img = preprocess_menu_image(io.BytesIO(path.read_bytes()))
+            reference = img.convert('L')
+            baseline = None
+            for name, options in ENCODERS.items():
+                settings = {**budget, **options}
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    data, mime_type, encoding = encode_menu_image(img, **settings)
+                seconds = (time.perf_counter() - start) / args.repeat
+                quality = psnr(reference, data)
+
+                stats = report[name]
+                stats['bytes'] += len(data)
+                stats['seconds'] += seconds
+                stats['psnr'].append(quality)
+                print(
+                    f'{path.name:<24} {name:<10} {encoding:<16} {len(data) / 1024:>7.1f} '
+                    f'{seconds * 1000:>7.1f} {quality:>6.1f}'
+                )
+
+                if app is not None:
+                    items = extract(app, data, mime_type)
+                    if baseline is None:
+                        baseline = items
+                    recall, allergens = agreement(baseline, items)
+                    stats['recall'].append(recall)
+                    stats['allergens'].append(allergens)
+            img.close()
+
+    fixed_bytes = report['fixed']['bytes']
+    header = f'\n{"encoder":<10} {"total KiB":>10} {"vs fixed":>9} {"encode ms":>10} {"min PSNR":>9}'
+    if app is not None:
+        header += f' {"item recall":>12} {"allergens":>10}'
+    print(header)
+    for name, stats in report.items():
+        line = (
+            f'{name:<10} {stats["bytes"] / 1024:>10.1f} {stats["bytes"] / fixed_bytes:>8.0%} '
+            f'{stats["seconds"] * 1000:>10.1f} {min(stats["psnr"]):>9.1f}'
+        )
+        if app is not None:
+            line += (
+                f' {sum(stats["recall"]) / len(stats["recall"]):>12.0%}'
+                f' {sum(stats["allergens"]) / len(stats["allergens"]):>10.0%}'
+            )
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
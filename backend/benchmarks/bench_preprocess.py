@@ -0,0 +1,138 @@
+"""Compare wall time and peak RSS of the menu image preprocessing pipelines.
+
+Usage:
+    python benchmarks/bench_preprocess.py [corpus_dir] [--repeat N]
+
+corpus_dir should contain sample menu photos (.jpg, .png, .heic, ...). When it
+is omitted a synthetic corpus of 12 MP and 48 MP phone-style photos is
+generated in a temporary directory. Each pipeline runs in its own process so
+that peak RSS is measured independently.
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.heic', '.heif', '.webp')
+PIPELINES = ('original', 'quality', 'balanced', 'fast')
+
+
+def generate_corpus(directory):
+    """Write synthetic menu photos that resemble phone camera uploads"""
+    from PIL import Image, ImageDraw
+
+    specs = [
+        ('menu_12mp.jpg', (4032, 3024), 'JPEG', 6),
+        ('menu_12mp_upright.jpg', (3024, 4032), 'JPEG', 1),
+        ('menu_48mp.jpg', (8064, 6048), 'JPEG', 6),
+        ('menu_12mp.png', (4032, 3024), 'PNG', 1),
+    ]
+    for name, size, image_format, orientation in specs:
+        img = Image.new('RGB', size, (246, 240, 228))
+        draw = ImageDraw.Draw(img)
+        line_height = size[1] // 60
+        for line in range(55):
+            y = line * line_height + line_height
+            draw.text((size[0] // 12, y), f'{line}. Grilled Salmon with lemon butter', fill=(20, 20, 20))
+            draw.text((size[0] * 3 // 4, y), f'${line + 9}.95', fill=(20, 20, 20))
+        exif = img.getexif()
+        exif[0x0112] = orientation
+        save_args = {'exif': exif}
+        if image_format == 'JPEG':
+            save_args['quality'] = 92
+        img.save(os.path.join(directory, name), image_format, **save_args)
+
+
+def run_pipeline(pipeline, paths, repeat, results):
+    """Child process: preprocess and encode every image, reporting time and peak RSS"""
+    from app.utils.image_processing import (
+        image_to_bytes,
+        preprocess_image,
+        preprocess_menu_image,
+    )
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    output_bytes = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            data = f.read()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            if pipeline == 'original':
+                img = preprocess_image(io.BytesIO(data))
+            else:
+                img = preprocess_menu_image(io.BytesIO(data), profile=pipeline)
+            output_bytes = len(image_to_bytes(img))
+            img.close()
+        timings.append((os.path.basename(path), (time.perf_counter() - start) / repeat, output_bytes))
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((pipeline, timings, baseline_rss, peak_rss))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('corpus_dir', nargs='?', help='Directory of sample menu images')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per image')
+    args = parser.parse_args()
+
+    # ru_maxrss survives fork/exec, so keep this parent process small and do all
+    # image work in children
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir = args.corpus_dir
+        if not corpus_dir:
+            print('No corpus given, generating synthetic menus...')
+            generator = context.Process(target=generate_corpus, args=(tmp,))
+            generator.start()
+            generator.join()
+            corpus_dir = tmp
+
+        paths = sorted(
+            str(p) for p in Path(corpus_dir).iterdir()
+            if p.suffix.lower() in IMAGE_EXTENSIONS
+        )
+        if not paths:
+            sys.exit(f'No images found in {corpus_dir}')
+
+        results = context.Queue()
+        report = {}
+        for pipeline in PIPELINES:
+            process = context.Process(
+                target=run_pipeline, args=(pipeline, paths, args.repeat, results)
+            )
+            process.start()
+            name, timings, baseline_rss, peak_rss = results.get()
+            process.join()
+            report[name] = (timings, baseline_rss, peak_rss)
+
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    rss_unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+
+    print(f'\n{"pipeline":<10} {"image":<24} {"ms":>8} {"jpeg KiB":>9}')
+    for pipeline, (timings, _, _) in report.items():
+        for image_name, seconds, output_bytes in timings:
+            print(f'{pipeline:<10} {image_name:<24} {seconds * 1000:>8.1f} {output_bytes / 1024:>9.1f}')
+
+    original_total = sum(t for _, t, _ in report['original'][0])
+    print(f'\n{"pipeline":<10} {"total ms":>9} {"speedup":>8} {"peak RSS MiB":>13} {"delta MiB":>10}')
+    for pipeline, (timings, baseline_rss, peak_rss) in report.items():
+        total = sum(t for _, t, _ in timings)
+        print(
+            f'{pipeline:<10} {total * 1000:>9.1f} {original_total / total:>7.2f}x '
+            f'{peak_rss / rss_unit:>13.1f} {(peak_rss - baseline_rss) / rss_unit:>10.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""Load-test the menu routes end to end against the offline fake LLM backend.
+
+Usage:
+    python benchmarks/load_fake_llm.py [--users 20] [--duration 30] [--latency lognormal:0.8,0.4]
+                                       [--error-rate 0.02] [--cache none]
+
+Builds the app with TestingConfig and the fake LLM backend (backed by a temporary
+SQLite file so that threads share data), then runs simulated users in threads
+through Flask test clients, locust style. Each user repeatedly picks a weighted
+task (manual input, image upload, streaming, history, search, /auth/me) and
+waits --wait seconds between tasks. No network access or API key is needed,
+and with a fixed --seed the model latencies and failures are reproducible.
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+DISHES = [
+    'Caesar Salad', 'Pad Thai', 'Margherita Pizza', 'Chicken Tikka Masala',
+    'Beef Pho', 'Shrimp Scampi', 'Falafel Wrap', 'Mushroom Risotto',
+    'Fish Tacos', 'Tiramisu', 'Peanut Noodles', 'Lobster Bisque',
+]
+STYLES = ['Classic', 'Spicy', 'Grilled', 'Vegan', 'Crispy', 'House', 'Smoked']
+
+
+def menu_image(seed, size=(2000, 1500)):
+    """Render a distinct menu-like JPEG"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    img = Image.new('RGB', size, (246, 240, 228))
+    draw = ImageDraw.Draw(img)
+    # A logo block in a different place per image, so the menus do not all share one layout
+    x, y = rng.randrange(0, size[0] - 600), rng.randrange(0, size[1] - 400)
+    draw.rectangle((x, y, x + 600, y + 400), fill=(rng.randrange(60, 200), 40, 40))
+    for line in range(30):
+        dish = f'{rng.choice(STYLES)} {rng.choice(DISHES)}'
+        draw.text((80, 40 + line * 45), f'{dish} .... ${rng.randint(8, 40)}', fill=(20, 20, 20))
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def manual_items(rng, count):
+    return [f'{rng.choice(STYLES)} {rng.choice(DISHES)} {rng.randint(1, 500)}' for _ in range(count)]
+
+
+def task_manual(client, headers, rng, images):
+    response = client.post(
+        '/api/process-manual-input',
+        headers=headers,
+        json={'menu_items': manual_items(rng, rng.randint(3, 15)), 'menu_name': 'Load manual'},
+    )
+    return response.status_code < 400
+
+
+def task_image(client, headers, rng, images):
+    response = client.post(
+        '/api/process-menu',
+        headers=headers,
+        data={'menu_image': (io.BytesIO(rng.choice(images)), 'menu.jpg')},
+        content_type='multipart/form-data',
+    )
+    return response.status_code < 400
+
+
+def task_stream(client, headers, rng, images):
+    response = client.post(
+        '/api/process-manual-input/stream',
+        headers=headers,
+        json={'menu_items': manual_items(rng, rng.randint(3, 15))},
+    )
+    # Errors after the stream starts arrive as an SSE error event with a 200
+    return response.status_code < 400 and 'event: error' not in response.get_data(as_text=True)
+
+
+def task_history(client, headers, rng, images):
+    response = client.get('/api/menu-uploads?limit=20&fields=summary', headers=headers)
+    return response.status_code < 400
+
+
+def task_search(client, headers, rng, images):
+    response = client.get(f'/api/menu-uploads/search?q={rng.choice(DISHES).split()[0]}', headers=headers)
+    return response.status_code < 400
+
+
+def task_me(client, headers, rng, images):
+    response = client.get('/api/auth/me', headers=headers)
+    return response.status_code < 400
+
+
+# name: (task, weight)
+TASKS = {
+    'POST /process-manual-input': (task_manual, 4),
+    'POST /process-menu': (task_image, 2),
+    'POST /process-manual-input/stream': (task_stream, 1),
+    'GET /menu-uploads': (task_history, 3),
+    'GET /menu-uploads/search': (task_search, 1),
+    'GET /auth/me': (task_me, 3),
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def create_users(app, count):
+    """Create load-test users directly in the database and mint their access tokens"""
+    from app.extensions import db
+    from app.models import User
+    from app.utils.jwt_utils import generate_access_token
+
+    with app.app_context():
+        users = [User(email=f'load-{uuid.uuid4().hex[:8]}@loadtest.invalid') for _ in range(count)]
+        db.session.add_all(users)
+        db.session.commit()
+        return [{'Authorization': f'Bearer {generate_access_token(user.id)}'} for user in users]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20, help='Concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--wait', type=float, default=0.1, help='Think time between tasks in seconds')
+    parser.add_argument('--latency', default='lognormal:0.8,0.4', help='LLM_FAKE_LATENCY distribution')
+    parser.add_argument('--latency-per-item', type=float, default=0.02, help='LLM_FAKE_LATENCY_PER_ITEM')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='LLM_FAKE_ERROR_RATE')
+    parser.add_argument('--cache', default='memory', choices=['memory', 'sql', 'none'], help='RESULT_CACHE_BACKEND')
+    parser.add_argument('--images', type=int, default=8, help='Distinct menu images to upload')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app reads its configuration at import time
+        os.environ.update({
+            'FLASK_ENV': 'testing',
+            'TEST_DATABASE_URL': f'sqlite:///{tmp}/load.db',
+            'TEST_LLM_BACKEND': 'fake',
+            'LLM_FAKE_LATENCY': args.latency,
+            'LLM_FAKE_LATENCY_PER_ITEM': str(args.latency_per_item),
+            'LLM_FAKE_ERROR_RATE': str(args.error_rate),
+            'LLM_FAKE_SEED': str(args.seed),
+            'RESULT_CACHE_BACKEND': args.cache,
+        })
+        from app import create_app
+        from app.utils.metrics import get_metrics
+
+        app = create_app('testing')
+        user_headers = create_users(app, args.users)
+        images = [menu_image(args.seed * 1000 + index) for index in range(args.images)]
+
+        names = list(TASKS)
+        weights = [TASKS[name][1] for name in names]
+        samples = defaultdict(list)
+        failures = defaultdict(int)
+        lock = threading.Lock()
+        deadline = time.monotonic() + args.duration
+
+        def user(index):
+            rng = random.Random(args.seed * 1000 + index)
+            client = app.test_client()
+            headers = user_headers[index]
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                start = time.perf_counter()
+                try:
+                    ok = TASKS[name][0](client, headers, rng, images)
+                except Exception:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    samples[name].append(elapsed)
+                    if not ok:
+                        failures[name] += 1
+                time.sleep(args.wait)
+
+        print(f'Running {args.users} users for {args.duration:.0f}s against the fake LLM ({args.latency})...')
+        start = time.perf_counter()
+        threads = [threading.Thread(target=user, args=(index,)) for index in range(args.users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        with app.app_context():
+            llm_stats = app.extensions['llm_backend'].stats()
+            cache_stats = app.extensions['result_cache'].stats()
+            stage_metrics = get_metrics().render()
+
+    print(
+        f'\n{"task":<36} {"reqs":>6} {"fails":>6} {"req/s":>7} '
+        f'{"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8}'
+    )
+    for name in names:
+        latencies = samples[name]
+        print(
+            f'{name:<36} {len(latencies):>6} {failures[name]:>6} {len(latencies) / elapsed:>7.1f} '
+            f'{percentile(latencies, 0.5) * 1000:>8.0f} {percentile(latencies, 0.95) * 1000:>8.0f} '
+            f'{percentile(latencies, 0.99) * 1000:>8.0f} {max(latencies, default=0) * 1000:>8.0f}'
+        )
+    total = sum(len(latencies) for latencies in samples.values())
+    print(f'{"total":<36} {total:>6} {sum(failures.values()):>6} {total / elapsed:>7.1f}')
+
+    print(f'\nfake LLM calls: {llm_stats["calls"]}, injected errors: {llm_stats["errors"]}')
+    print(f'result cache: {cache_stats}')
+    print('\nmean stage time (ms):')
+    sums = {}
+    counts = {}
+    for line in stage_metrics.splitlines():
+        if line.startswith('menu_stage_duration_seconds_sum'):
+            sums[line.split('"')[1]] = float(line.split()[-1])
+        elif line.startswith('menu_stage_duration_seconds_count'):
+            counts[line.split('"')[1]] = int(line.split()[-1])
+    for stage, seconds in sums.items():
+        print(f'  {stage:<20} {seconds / counts[stage] * 1000:>8.1f}  ({counts[stage]} samples)')
+
+
+if __name__ == '__main__':
+    main()
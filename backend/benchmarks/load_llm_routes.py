@@ -0,0 +1,235 @@
+"""Load-test LLM-bound routes under sync and gevent gunicorn workers.
+
+Usage:
+    python benchmarks/load_llm_routes.py [--requests 100] [--latency 1.0] [--worker-classes sync gevent]
+
+Starts a local stub of the Gemini API that answers after a fixed latency,
+then for each worker class runs a single-worker gunicorn against it and fires
+all requests at /process-manual-input at once. While the load runs, a probe
+polls /auth/me to show whether non-LLM routes stay responsive. The report
+shows throughput, latency and the peak number of model calls in flight.
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+STUB_ITEM = {'item_name': 'Stub Dish', 'common_allergens': ['None'], 'confidence_score': 5}
+
+
+class StubGemini(ThreadingHTTPServer):
+    """Answers generateContent calls after a fixed delay and tracks calls in flight"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, latency):
+        super().__init__(('127.0.0.1', 0), StubGeminiHandler)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def reset(self):
+        with self.lock:
+            self.in_flight = 0
+            self.peak_in_flight = 0
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+        body = json.dumps({
+            'candidates': [{
+                'content': {'role': 'model', 'parts': [{'text': json.dumps([STUB_ITEM])}]},
+                'finishReason': 'STOP',
+            }],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def create_user_token():
+    """Create a load-test user directly in the database and mint an access token"""
+    from app import create_app
+    from app.extensions import db
+    from app.models import User
+    from app.utils.jwt_utils import generate_access_token
+
+    app = create_app()
+    with app.app_context():
+        user = User(email=f'load-{uuid.uuid4().hex[:8]}@loadtest.invalid')
+        db.session.add(user)
+        db.session.commit()
+        return generate_access_token(user.id)
+
+
+def wait_for_server(base_url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit('gunicorn exited during startup')
+        try:
+            requests.get(f'{base_url}/health', timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    sys.exit('gunicorn did not start in time')
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run(worker_class, args, env, token, stub):
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}/api'
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'run:app', '--workers', '1', '--bind', f'127.0.0.1:{port}'],
+        cwd=BACKEND_DIR,
+        env={**env, 'GUNICORN_WORKER_CLASS': worker_class},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(base_url, process)
+        headers = {'Authorization': f'Bearer {token}'}
+        stub.reset()
+
+        probe_latencies = []
+        done = threading.Event()
+
+        def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                try:
+                    requests.get(f'{base_url}/auth/me', headers=headers, timeout=args.timeout)
+                    probe_latencies.append(time.perf_counter() - start)
+                except requests.RequestException:
+                    probe_latencies.append(args.timeout)
+                time.sleep(0.1)
+
+        def call(index):
+            start = time.perf_counter()
+            try:
+                response = requests.post(
+                    f'{base_url}/process-manual-input',
+                    headers=headers,
+                    json={'menu_items': [f'Dish {uuid.uuid4().hex}'], 'menu_name': f'Load {index}'},
+                    timeout=args.timeout,
+                )
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            return ok, time.perf_counter() - start
+
+        prober = threading.Thread(target=probe, daemon=True)
+        prober.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.requests) as pool:
+            outcomes = list(pool.map(call, range(args.requests)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        prober.join()
+    finally:
+        process.terminate()
+        process.wait()
+
+    latencies = [latency for ok, latency in outcomes if ok]
+    return {
+        'worker_class': worker_class,
+        'ok': len(latencies),
+        'errors': len(outcomes) - len(latencies),
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'peak_in_flight': stub.peak_in_flight,
+        'probe_p95': percentile(probe_latencies, 0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100, help='Concurrent LLM requests to send')
+    parser.add_argument('--latency', type=float, default=1.0, help='Stub Gemini latency in seconds')
+    parser.add_argument('--timeout', type=float, default=300, help='Client timeout in seconds')
+    parser.add_argument('--worker-classes', nargs='+', default=['sync', 'gevent'])
+    args = parser.parse_args()
+
+    stub = StubGemini(args.latency)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            'FLASK_ENV': 'development',
+            'SECRET_KEY': 'load-test-secret',
+            'DATABASE_URL': f'sqlite:///{tmp}/load.db',
+            'GEMINI_API_KEY': 'stub',
+            'GEMINI_BASE_URL': f'http://127.0.0.1:{stub.server_address[1]}',
+            'GEMINI_RETRY_ATTEMPTS': '1',
+            'RESULT_CACHE_BACKEND': 'none',
+        }
+        # The app reads its configuration at import time
+        os.environ.update(env)
+        token = create_user_token()
+
+        results = [run(worker_class, args, env, token, stub) for worker_class in args.worker_classes]
+
+    print(
+        f'\n{"worker":<8} {"ok":>5} {"errors":>6} {"seconds":>8} {"req/s":>7} '
+        f'{"p50 s":>7} {"p95 s":>7} {"peak LLM":>9} {"/auth/me p95 s":>15}'
+    )
+    for r in results:
+        print(
+            f'{r["worker_class"]:<8} {r["ok"]:>5} {r["errors"]:>6} {r["seconds"]:>8.2f} '
+            f'{r["throughput"]:>7.1f} {r["p50"]:>7.2f} {r["p95"]:>7.2f} '
+            f'{r["peak_in_flight"]:>9} {r["probe_p95"]:>15.3f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Gunicorn settings, loaded automatically by `gunicorn run:app` from this directory.
+
+Menu analysis requests spend almost all of their time waiting on Gemini, so
+the default worker class is gevent: every in-flight request is a greenlet and
+one worker process can hold hundreds of model calls open while auth and
+allergy requests keep being served. Set GUNICORN_WORKER_CLASS=sync to go back
+to one request per worker process. Worker count follows WEB_CONCURRENCY.
+
+Image decoding and encoding still run in IMAGE_WORKERS separate processes under
+gevent. ProcessPoolExecutor cannot be used there, so each worker hands tasks to
+its processes through gevent's native thread pool instead, and the processes
+are started with spawn rather than forkserver.
+"""
+
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+
+# Concurrent requests per gevent worker
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 500))
+
+# Above GEMINI_TIMEOUT so a slow model call is not killed mid-request
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# How long a stopping worker may take to finish its requests and background jobs
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+if worker_class == 'gevent':
+    # Let each worker keep as many Gemini calls open as it has requests in flight
+    os.environ.setdefault('GEMINI_MAX_CONNECTIONS', str(worker_connections))
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent' and os.environ.get('DATABASE_URL', '').startswith('postgres'):
+        # psycopg2 blocks the whole worker unless it yields to the gevent hub
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+
+
+def post_worker_init(worker):
+    # Start this worker's image processes now, not on its first upload
+    worker.wsgi.extensions['image_workers'].warm()
+
+
+def worker_exit(server, worker):
+    # Background jobs live in this process; let running ones finish while there is time
+    # and mark the rest failed, instead of leaving them in progress forever
+    app = getattr(worker, 'wsgi', None)
+    if app is not None:
+        app.extensions['job_queue'].shutdown(timeout=graceful_timeout / 2)
@@ -0,0 +1,41 @@
+from app import create_app
+from app.extensions import db
+from sqlalchemy import Index, UniqueConstraint, inspect
+from sqlalchemy.schema import CreateColumn
+
+app = create_app()
+with app.app_context():
+    # create_all (run by create_app) makes missing tables but never alters existing ones,
+    # so add the columns, indexes and unique constraints they have gained since
+    inspector = inspect(db.engine)
+    changes = []
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+                    conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column_ddl}')
+                    changes.append(f'{table.name}.{column.name}')
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            existing_indexes |= {
+                constraint['name'] for constraint in inspector.get_unique_constraints(table.name)
+            }
+            # SQLite cannot add constraints to a table, so named unique constraints become unique indexes
+            missing_indexes = [index for index in table.indexes if index.name not in existing_indexes]
+            missing_indexes += [
+                Index(constraint.name, *constraint.columns, unique=True)
+                for constraint in table.constraints
+                if isinstance(constraint, UniqueConstraint)
+                and constraint.name
+                and constraint.name not in existing_indexes
+            ]
+            for index in missing_indexes:
+                index.create(conn)
+                changes.append(index.name)
+
+    print(f'Database upgraded: {", ".join(changes)}.' if changes else 'Database is up to date.')